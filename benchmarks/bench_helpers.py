@@ -0,0 +1,165 @@
+#!/usr/bin/python3
+# Micro-benchmarks of the helpers run for every LP task or Jira issue
+#
+# Each benchmark runs a helper over synthetic inputs at several scales and
+# reports the best time of a few repeats. Results can be saved as a baseline
+# and later runs compared against it to catch regressions.
+#
+#   python3 benchmarks/bench_helpers.py --save benchmarks/baseline.json
+#   python3 benchmarks/bench_helpers.py --compare benchmarks/baseline.json
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import timeit
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lp_to_jira_sync.lp_task import LPTask  # noqa: E402
+from lp_to_jira_sync.sync_config import SyncConfig  # noqa: E402
+from lp_to_jira_sync.lp_to_jira_sync import (  # noqa: E402
+    checklist, get_bug_id, get_bug_pkg, lp_assignee, refine_tasks)
+
+
+default_scales = [1000, 10000, 100000]
+
+series = ['', ' Focal', ' Jammy', ' Noble', ' Oracular']
+statuses = ['New', 'Confirmed', 'Triaged', 'In Progress', 'Fix Released']
+importances = ['Undecided', 'Low', 'Medium', 'High', 'Critical']
+
+
+def package_name(i):
+    return "package{}".format(i % 2000)
+
+
+def make_tasks(n):
+    tasks = []
+    for i in range(n):
+        bug_id = 1000000 + i // len(series)
+        target = "{} (Ubuntu{})".format(package_name(bug_id), series[i % 5])
+        tasks.append(LPTask(
+            bug_id=bug_id,
+            target_name=target,
+            title='Bug #{} in {}: "Something is broken in {}"'.format(
+                bug_id, target, package_name(bug_id)),
+            status=statuses[i % 5],
+            importance=importances[i % 5],
+            assignee_link=("https://api.launchpad.net/devel/~dev{}".format(i)
+                           if i % 3 == 0 else None),
+            is_complete=i % 5 == 4,
+            web_link="https://bugs.launchpad.net/bugs/{}".format(bug_id)))
+    return tasks
+
+
+def make_summaries(n):
+    return ["LP#{} [{}] Something is broken in {}".format(
+        1000000 + i, package_name(i), package_name(i)) for i in range(n)]
+
+
+def make_config(mapping_path):
+    return SyncConfig(
+        jira=MagicMock(),
+        lp_api=MagicMock(),
+        packages_mapping_json=mapping_path,
+        special_packages=['subiquity', 'netplan', 'apport'])
+
+
+def benchmarks(n, config):
+    """Return {name: callable} running each helper over n inputs"""
+    tasks = make_tasks(n)
+    tasksets = [tasks[i:i + len(series)]
+                for i in range(0, n, len(series))]
+    summaries = make_summaries(n)
+    packages = [package_name(i) for i in range(n)]
+
+    return {
+        'refine_tasks': lambda: refine_tasks(tasks, config),
+        'checklist': lambda: [checklist(t) for t in tasksets],
+        'get_bug_id': lambda: [get_bug_id(s) for s in summaries],
+        'get_bug_pkg': lambda: [get_bug_pkg(s) for s in summaries],
+        'lp_assignee': lambda: [lp_assignee(t) for t in tasksets],
+        'package_to_component': lambda: [
+            config.package_to_component(p) for p in packages],
+    }
+
+
+def run(scales, repeat):
+    with tempfile.NamedTemporaryFile('w', suffix='.json') as mapping:
+        # 40 components of 50 packages, a quarter of the packages mapped
+        json.dump({"component{}".format(c): [
+            package_name(c * 200 + i) for i in range(50)]
+            for c in range(40)}, mapping)
+        mapping.flush()
+        config = make_config(mapping.name)
+    config.restricted_pkgs = [package_name(i) for i in range(0, 2000, 2)]
+
+    results = {}
+    for n in scales:
+        for name, bench in benchmarks(n, config).items():
+            best = min(timeit.repeat(bench, number=1, repeat=repeat))
+            results.setdefault(name, {})[str(n)] = round(best, 6)
+            print("{:<22} {:>7} {:>10.2f} ms".format(name, n, best * 1000))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print the ratio to the baseline, return the regressions"""
+    regressions = []
+    print("\n{:<22} {:>7} {:>10} {:>10} {:>7}".format(
+        'benchmark', 'n', 'base ms', 'now ms', 'ratio'))
+    for name, scales in results.items():
+        for n, seconds in scales.items():
+            base = baseline.get(name, {}).get(n)
+            if not base:
+                continue
+            ratio = seconds / base
+            flag = ""
+            if ratio > threshold:
+                flag = " REGRESSION"
+                regressions.append((name, n, ratio))
+            print("{:<22} {:>7} {:>10.2f} {:>10.2f} {:>6.2f}x{}".format(
+                name, n, base * 1000, seconds * 1000, ratio, flag))
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Micro-benchmarks of the lp-to-jira-sync helpers')
+    parser.add_argument(
+        '-n', '--scale', dest='scales', type=int, action='append',
+        help='number of inputs, can be repeated (default 1k, 10k and 100k)')
+    parser.add_argument(
+        '-r', '--repeat', type=int, default=5,
+        help='keep the best of this many runs')
+    parser.add_argument(
+        '--save', metavar='FILE',
+        help='store the results as a baseline in FILE')
+    parser.add_argument(
+        '--compare', metavar='FILE',
+        help='compare the results with the baseline in FILE')
+    parser.add_argument(
+        '--threshold', type=float, default=1.5,
+        help='slowdown ratio to the baseline reported as a regression')
+    opts = parser.parse_args(args)
+
+    results = run(opts.scales or default_scales, opts.repeat)
+
+    if opts.save:
+        with open(opts.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if opts.compare:
+        with open(opts.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, opts.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""Limits on how much a run may write to Jira and for how long
+
+A run stops taking on new bugsets once it has sent --max-writes write
+requests or has been running for --time-budget seconds. The limits are
+checked between bugsets so the last one may go slightly over. Writes queued
+for a bulk edit, or deferred until one is sent, count as already sent.
+Bugsets are scheduled most important first, what is left is picked up by the
+next run.
+"""
+import time
+
+from lp_to_jira_sync import http_hooks
+
+
+read_methods = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RunBudget:
+    def __init__(self, max_writes=None, time_budget=None):
+        self.max_writes = max_writes
+        self.time_budget = time_budget
+        self.writes = 0
+        self.started = time.monotonic()
+
+    def start(self):
+        # Ahead of a replaying cassette so replayed writes count as well
+        http_hooks.install(self, first=True)
+        return self
+
+    def stop(self):
+        http_hooks.uninstall(self)
+
+    def __call__(self, request, send):
+        if request.method.upper() not in read_methods:
+            self.writes += 1
+        return send()
+
+    def exhausted(self, pending=0):
+        """Return why the run should stop, or None. pending is the number
+        of writes queued but not sent yet"""
+        writes = self.writes + pending
+        if self.max_writes is not None and writes >= self.max_writes:
+            return "{} writes".format(writes)
+        elapsed = time.monotonic() - self.started
+        if self.time_budget is not None and elapsed >= self.time_budget:
+            return "{:.0f}s".format(elapsed)
+        return None
@@ -0,0 +1,144 @@
+"""Coalesce the identical field changes of a run into Jira bulk edits
+
+A mass importance change in LP, or a new component mapping, gives hundreds
+of issues the same new priority or component. sync() queues these changes
+instead of sending them, and flush() sends each group of issues receiving
+the same change as one bulk edit. Issues the bulk edit didn't process, or
+all of them when the server has no bulk edit API (Jira Server/Data Center),
+are updated one by one.
+
+Whatever must only happen once an issue is edited, like recording the
+fingerprint of its synced state, is deferred until it has been.
+"""
+import json
+import time
+
+# Most issues a single bulk edit accepts
+BULK_MAX_ISSUES = 1000
+
+
+class BulkEdits:
+    def __init__(self, jira, component_ids={}, poll=1.0, timeout=120):
+        self.jira = jira
+        self.component_ids = component_ids
+        self.poll = poll
+        self.timeout = timeout
+        self.supported = True
+        # (field, value) -> {issue key: issue id}
+        self.pending = {}
+        # issue key -> actions to run once its edits are sent
+        self.deferred = {}
+        # Write requests the deferred actions will send
+        self.deferred_writes = 0
+        self._priority_ids = None
+
+    def add(self, issue, field, value):
+        """Queue setting field ('priority' or 'components') of issue to the
+        named value"""
+        # Only what the edit needs, not the whole issue
+        self.pending.setdefault((field, value), {})[issue.key] = issue.id
+
+    def is_pending(self, key):
+        return any(key in issues for issues in self.pending.values())
+
+    def defer(self, key, action, writes=1):
+        """Run action, which sends writes write requests, once the queued
+        edits of issue key are sent"""
+        if self.is_pending(key):
+            self.deferred.setdefault(key, []).append(action)
+            self.deferred_writes += writes
+        else:
+            action()
+
+    def pending_writes(self):
+        """Number of write requests flush() is expected to send"""
+        writes = self.deferred_writes
+        for issues in self.pending.values():
+            if len(issues) > 1 and self.supported:
+                writes += -(-len(issues) // BULK_MAX_ISSUES)
+            else:
+                writes += len(issues)
+        return writes
+
+    def flush(self):
+        for (field, value), issues in self.pending.items():
+            issues = list(issues.items())
+            for start in range(0, len(issues), BULK_MAX_ISSUES):
+                batch = issues[start:start + BULK_MAX_ISSUES]
+                if len(batch) > 1 and self.supported:
+                    print("-> Bulk updating {} of {} issues to {}".format(
+                        field, len(batch), value))
+                    batch = self._bulk_edit(field, value, batch)
+                for key, _ in batch:
+                    self._edit(key, field, value)
+        self.pending = {}
+
+        for actions in self.deferred.values():
+            for action in actions:
+                action()
+        self.deferred = {}
+        self.deferred_writes = 0
+
+    def _edit(self, key, field, value):
+        # By key, without loading the issue nor reloading it after
+        if field == 'priority':
+            fields = {'priority': {'name': value}}
+        else:
+            fields = {'components': [{'name': value}]}
+        self.jira._session.put(
+            self.jira._get_url('issue/{}'.format(key)),
+            data=json.dumps({'fields': fields}))
+
+    def _edited_fields(self, field, value):
+        if field == 'priority':
+            if self._priority_ids is None:
+                self._priority_ids = {
+                    p.name: p.id for p in self.jira.priorities()}
+            return {'priority': {'priorityId': self._priority_ids[value]}}
+
+        return {'multiselectComponents': {
+            'fieldId': 'components',
+            'bulkEditMultiSelectFieldOption': 'REPLACE',
+            'components': [{'componentId': int(self.component_ids[value])}],
+        }}
+
+    def _bulk_edit(self, field, value, issues):
+        """Submit a bulk edit of the (key, id) issues and wait for it,
+        return the issues it didn't process"""
+        from jira.exceptions import JIRAError
+
+        payload = {
+            'selectedIssueIdsOrKeys': [key for key, _ in issues],
+            'selectedActions': [field],
+            'editedFieldsInput': self._edited_fields(field, value),
+            'sendBulkNotification': False,
+        }
+        try:
+            response = self.jira._session.post(
+                self.jira._get_url('bulk/issues/fields'),
+                data=json.dumps(payload))
+            task_id = response.json()['taskId']
+
+            deadline = time.monotonic() + self.timeout
+            while True:
+                task = self.jira._get_json('bulk/queue/{}'.format(task_id))
+                if task['status'] not in ('ENQUEUED', 'RUNNING'):
+                    break
+                if time.monotonic() > deadline:
+                    print("-> Bulk edit {} didn't complete, updating issues "
+                          "one by one".format(task_id))
+                    return issues
+                time.sleep(self.poll)
+        except JIRAError as e:
+            if e.status_code in (404, 405):
+                # No bulk edit API on this server, don't try again
+                self.supported = False
+            print("-> Bulk edit failed ({}), updating issues one by one"
+                  .format(e.status_code))
+            return issues
+
+        processed = {str(id) for id in task.get('processedAccessibleIssues',
+                                                [])}
+        failed = task.get('failedAccessibleIssues', {})
+        return [(key, id) for key, id in issues
+                if str(id) not in processed or str(id) in failed]
@@ -0,0 +1,176 @@
+"""Record every LP and Jira HTTP exchange of a run and serve them back
+
+A cassette is a directory holding exchanges.jsonl, one recorded exchange
+per line, and meta.json with what a replay needs to rebuild the clients
+(the Jira server address). Request headers are never stored so credentials
+do not end up in a cassette.
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+
+from lp_to_jira_sync import http_hooks
+
+
+EXCHANGES = 'exchanges.jsonl'
+META = 'meta.json'
+
+# Headers describing the wire encoding of the original response, they do
+# not apply to the decoded content we store
+_dropped_headers = ('content-encoding', 'content-length', 'transfer-encoding',
+                    'set-cookie', 'status', '-content-encoding')
+
+
+class CassetteMiss(LookupError):
+    pass
+
+
+def exchange_key(request):
+    body = hashlib.sha1(request.body or b'').hexdigest()
+    return "{} {} {}".format(request.method.upper(), request.url, body)
+
+
+class Cassette:
+    def __init__(self, path, mode='record', latency=0.0):
+        if mode not in ('record', 'replay'):
+            raise ValueError("Unknown cassette mode {}".format(mode))
+        self.path = path
+        self.mode = mode
+        # seconds added to each replayed exchange, or 'recorded' to wait for
+        # as long as the original request took
+        self.latency = latency
+        self.meta = {}
+        self._lock = threading.Lock()
+        self._exchanges = {}
+        self._served = {}
+        self._file = None
+
+    @property
+    def replaying(self):
+        return self.mode == 'replay'
+
+    def start(self):
+        if self.replaying:
+            self._load()
+        else:
+            os.makedirs(self.path, exist_ok=True)
+            self._file = open(os.path.join(self.path, EXCHANGES), 'w')
+        http_hooks.install(self)
+        return self
+
+    def stop(self):
+        http_hooks.uninstall(self)
+        if self._file:
+            self._file.close()
+            self._file = None
+            with open(os.path.join(self.path, META), 'w') as f:
+                json.dump(self.meta, f, indent=2)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.path, META)) as f:
+                self.meta = json.load(f)
+            with open(os.path.join(self.path, EXCHANGES)) as f:
+                for line in f:
+                    exchange = json.loads(line)
+                    self._exchanges.setdefault(
+                        exchange['key'], []).append(exchange)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            raise ValueError(
+                "Cannot read cassette {}".format(self.path)) from e
+
+    def latencies(self):
+        """Yield the method, url and duration of the replayed exchanges as
+        they were recorded"""
+        for key, exchanges in self._exchanges.items():
+            method, url, _ = key.split(' ')
+            for exchange in exchanges:
+                yield method, url, exchange['elapsed']
+
+    def __call__(self, request, send):
+        if self.replaying:
+            return self._replay(request)
+        return self._record(request, send)
+
+    def _record(self, request, send):
+        started = time.monotonic()
+        response = send()
+        elapsed = time.monotonic() - started
+
+        if request.transport == 'requests':
+            status = response.status_code
+            reason = response.reason
+            headers = dict(response.headers)
+            content = response.content
+        else:
+            response_info, content = response
+            status = response_info.status
+            reason = response_info.reason
+            headers = dict(response_info)
+
+        exchange = {
+            'key': exchange_key(request),
+            'transport': request.transport,
+            'status': status,
+            'reason': reason,
+            'headers': {k: v for k, v in headers.items()
+                        if k.lower() not in _dropped_headers},
+            'content': base64.b64encode(content or b'').decode('ascii'),
+            'elapsed': round(elapsed, 4),
+        }
+        with self._lock:
+            self._file.write(json.dumps(exchange) + '\n')
+            self._file.flush()
+
+        return response
+
+    def _replay(self, request):
+        key = exchange_key(request)
+        with self._lock:
+            recorded = self._exchanges.get(key)
+            if not recorded:
+                raise CassetteMiss(
+                    "No recorded exchange for {}".format(key))
+            # Identical requests are served in recording order, the last one
+            # keeps being served once the recording is exhausted
+            index = self._served.get(key, 0)
+            self._served[key] = index + 1
+            exchange = recorded[min(index, len(recorded) - 1)]
+
+        if self.latency == 'recorded':
+            time.sleep(exchange['elapsed'])
+        elif self.latency:
+            time.sleep(self.latency)
+
+        content = base64.b64decode(exchange['content'])
+
+        if request.transport == 'requests':
+            import requests
+            from requests.structures import CaseInsensitiveDict
+            from requests.utils import get_encoding_from_headers
+
+            response = requests.Response()
+            response.status_code = exchange['status']
+            response.reason = exchange['reason']
+            response.headers = CaseInsensitiveDict(exchange['headers'])
+            response.encoding = get_encoding_from_headers(response.headers)
+            response.url = request.url
+            response._content = content
+            return response
+
+        import httplib2
+
+        info = dict(exchange['headers'])
+        info['status'] = str(exchange['status'])
+        response = httplib2.Response(info)
+        response.reason = exchange['reason']
+        return response, content
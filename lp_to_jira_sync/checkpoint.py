@@ -0,0 +1,110 @@
+"""Journal of a sync run so an interrupted run can be resumed
+
+The journal is a JSON lines file. The first lines hold what the read phase
+fetched (LP task snapshots, the Jira issue index and the sponsored bugs), then a
+line is appended every time a bugset is completed. A resumed run reloads the
+snapshots instead of reading LP and Jira again and skips completed bugsets.
+"""
+import json
+import os
+
+from lp_to_jira_sync.lp_task import LPTask
+from lp_to_jira_sync.jira_issue import JiraIssue
+
+
+def cache_dir():
+    return os.getenv("SNAP_USER_COMMON") or os.path.join(
+        os.path.expanduser('~'), '.cache', 'lp-to-jira-sync')
+
+
+def default_path(project, tag):
+    return os.path.join(cache_dir(), "{}-{}.journal".format(project, tag))
+
+
+class Checkpoint:
+    def __init__(self, path, project="", tag=""):
+        self.path = path
+        self.project = project
+        self.tag = tag
+        self.tasks = {}
+        self.issues = {}
+        self.sponsored_bugs = set()
+        self.done = set()
+        self._file = None
+
+    def load(self):
+        """Read a journal left by an interrupted run of the same project and
+        tag, return False if there is none to resume from"""
+        lines = []
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        lines.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # The run was killed while writing this line
+                        break
+        except FileNotFoundError:
+            return False
+
+        if not lines or lines[0] != {'project': self.project,
+                                     'tag': self.tag}:
+            return False
+        if not any('sponsored' in line for line in lines):
+            # Interrupted during the read phase, there is nothing to reuse
+            return False
+
+        for line in lines[1:]:
+            if 'tasks' in line:
+                self.tasks = {
+                    (bug_id, pkg): [LPTask(*task) for task in tasks]
+                    for bug_id, pkg, tasks in line['tasks']}
+            elif 'issues' in line:
+                self.issues = {
+                    (bug_id, pkg): JiraIssue(*issue)
+                    for bug_id, pkg, issue in line['issues']}
+            elif 'sponsored' in line:
+                self.sponsored_bugs = set(line['sponsored'])
+            elif 'done' in line:
+                self.done.add(tuple(line['done']))
+
+        # Rewrite what could be read so new lines don't follow a torn one
+        self._file = open(self.path, 'w')
+        for line in lines:
+            self._write(line)
+        return True
+
+    def start(self, tasks, issues, sponsored_bugs):
+        """Start a new journal from what the read phase fetched"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._file = open(self.path, 'w')
+        self._write({'project': self.project, 'tag': self.tag})
+        self._write({'tasks': [
+            [bugset[0], bugset[1], [list(task) for task in taskset]]
+            for bugset, taskset in tasks.items()]})
+        self._write({'issues': [
+            [bugset[0], bugset[1], list(issue)]
+            for bugset, issue in issues.items()]})
+        self._write({'sponsored': sorted(sponsored_bugs)})
+
+    def complete(self, bugset):
+        self.done.add(bugset)
+        self._write({'done': list(bugset)})
+
+    def is_done(self, bugset):
+        return bugset in self.done
+
+    def finish(self):
+        """The run went through, nothing left to resume"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _write(self, line):
+        self._file.write(json.dumps(line) + '\n')
+        self._file.flush()
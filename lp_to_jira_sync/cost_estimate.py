@@ -0,0 +1,287 @@
+"""Requests a real run would make, estimated by a dry run
+
+With --estimate the dry run takes the same code paths as a real run against
+a DryRunJira client, which performs the reads and only records the writes.
+Reads are counted as they are sent. Writes are counted as the jira client
+would send them: a transition by name first lists the transitions, an
+update or a create reloads the issue. Any write that would still reach a
+server is refused.
+
+The report lists the requests per phase and endpoint, and estimates how long
+the real run would take: the measured duration of each phase plus the
+latency of the writes it didn't send. Latencies come from the requests of
+the run itself, or from the recorded exchanges of a replayed cassette.
+"""
+import collections
+import contextlib
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+from urllib.parse import urlsplit, parse_qs
+
+from lp_to_jira_sync import http_hooks
+from lp_to_jira_sync.budget import read_methods
+
+
+class DryRunWrite(RuntimeError):
+    pass
+
+
+_id_segment = re.compile(r'^\d+$')
+_key_segment = re.compile(r'^[A-Z][A-Z0-9_]*-\d+$')
+
+
+def endpoint(url):
+    """Return the service and endpoint of url, with ids and names replaced
+    by placeholders"""
+    parts = urlsplit(url)
+    segments = [s for s in parts.path.split('/') if s]
+    if 'launchpad' in parts.netloc:
+        service = 'lp'
+        segments = segments[1:]
+    elif segments[:1] == ['rest']:
+        service = 'jira'
+        segments = segments[3:]
+    else:
+        service = parts.netloc
+
+    path = []
+    previous = None
+    for segment in segments:
+        if _id_segment.match(segment):
+            path.append('{id}')
+        elif _key_segment.match(segment):
+            path.append('{key}')
+        elif segment.startswith('~'):
+            path.append('~{person}')
+        elif previous == '+source':
+            path.append('{package}')
+        elif previous == 'properties':
+            path.append('{property}')
+        else:
+            path.append(segment)
+        previous = segment
+
+    name = '/'.join(path)
+    op = parse_qs(parts.query).get('ws.op')
+    if op:
+        name += '?ws.op=' + op[0]
+    return service, name
+
+
+_services = {'lp': 'LP', 'jira': 'Jira'}
+
+
+class CostEstimate:
+    def __init__(self):
+        # (phase, service, method, endpoint, kind) -> number of requests
+        self.requests = collections.Counter()
+        # (service, method, endpoint) -> durations in seconds
+        self.latencies = collections.defaultdict(list)
+        self.phases = []
+        self.current = 'init'
+        self.budget = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        # Ahead of a replaying cassette, which would answer writes
+        http_hooks.install(self, first=True)
+        return self
+
+    def stop(self):
+        http_hooks.uninstall(self)
+
+    def __call__(self, request, send):
+        method = request.method.upper()
+        if method not in read_methods:
+            raise DryRunWrite("Dry run attempted {} {}".format(
+                method, request.url))
+
+        started = time.perf_counter()
+        response = send()
+        elapsed = time.perf_counter() - started
+
+        service, path = endpoint(request.url)
+        with self._lock:
+            self.requests[(self.current, service, method, path, 'read')] += 1
+            self.latencies[(service, method, path)].append(elapsed)
+        return response
+
+    def record(self, service, method, path, kind):
+        """Count a request the dry run didn't send"""
+        with self._lock:
+            self.requests[(self.current, service, method, path, kind)] += 1
+        if self.budget and method not in read_methods:
+            self.budget.writes += 1
+
+    def load_latencies(self, cassette):
+        """Use the durations recorded by cassette instead of the measured
+        ones"""
+        recorded = collections.defaultdict(list)
+        for method, url, elapsed in cassette.latencies():
+            service, path = endpoint(url)
+            recorded[(service, method.upper(), path)].append(elapsed)
+        self.latencies = recorded
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self.current = name
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def latency(self, service, method, path):
+        """Mean duration of the requests to an endpoint, or of the requests
+        to the service with the same method, or to the service"""
+        for match in ((lambda key: key == (service, method, path)),
+                      (lambda key: key[:2] == (service, method)),
+                      (lambda key: key[0] == service)):
+            durations = [d for key, values in self.latencies.items()
+                         if match(key) for d in values]
+            if durations:
+                return sum(durations) / len(durations)
+        return 0.0
+
+    def report(self):
+        lines = ["Estimated requests of a real run:"]
+        totals = collections.Counter()
+        unsent = collections.Counter()
+        for name, _ in self.phases:
+            entries = sorted((key[1:], count)
+                             for key, count in self.requests.items()
+                             if key[0] == name)
+            if not entries:
+                continue
+            lines.append("  {}".format(name))
+            for (service, method, path, kind), count in entries:
+                lines.append("    {:<4} {:<6} {:<44} {:>6}{}".format(
+                    service, method, path, count,
+                    "" if kind == 'read' else "  ({})".format(kind)))
+                if kind == 'read':
+                    service = _services.get(service, service)
+                    totals[service + " reads"] += count
+                else:
+                    totals[kind + "s"] += count
+                    unsent[name] += count * self.latency(
+                        service, method, path)
+
+        lines.append("  Total: " + ", ".join(
+            "{} {}".format(totals[kind], kind) for kind in
+            ('LP reads', 'Jira reads', 'updates', 'transitions', 'comments',
+             'creates')))
+
+        estimated = {name: elapsed + unsent[name]
+                     for name, elapsed in self.phases}
+        total = sum(estimated.values())
+        requests = sum(self.requests.values())
+        lines.append("Estimated duration: {:.1f}s ({}), {:.1f} requests/s"
+                     .format(total, ", ".join(
+                         "{} {:.1f}s".format(name, seconds)
+                         for name, seconds in estimated.items()),
+                         requests / total if total else 0))
+
+        return "\n".join(lines) + "\n"
+
+
+def estimate_phase(estimate, name):
+    if not estimate:
+        return contextlib.nullcontext()
+    return estimate.phase(name)
+
+
+class DryRunIssue:
+    """Jira issue whose updates are recorded instead of sent"""
+    def __init__(self, issue, jira):
+        self._issue = issue
+        self._jira = jira
+        jira._ids[issue.key] = issue.id
+
+    def __getattr__(self, name):
+        return getattr(self._issue, name)
+
+    def __str__(self):
+        return str(self._issue.key)
+
+    def update(self, *args, **kwargs):
+        self._jira._record('PUT', 'issue/{key}', 'update')
+        # The jira client reloads an issue after updating it
+        self._jira._record('GET', 'issue/{key}', 'read')
+
+
+class DryRunJira:
+    """Jira client performing the reads and recording the writes"""
+    def __init__(self, jira, estimate):
+        self._jira = jira
+        self._estimate = estimate
+        self._ids = {}
+        self._created = 0
+        self._bulk_edits = []
+        self._session = SimpleNamespace(post=self._bulk_post,
+                                        put=self._put)
+
+    def __getattr__(self, name):
+        return getattr(self._jira, name)
+
+    def _record(self, method, path, kind):
+        self._estimate.record('jira', method, path, kind)
+
+    def issue(self, *args, **kwargs):
+        return DryRunIssue(self._jira.issue(*args, **kwargs), self)
+
+    def search_issues(self, *args, **kwargs):
+        issues = self._jira.search_issues(*args, **kwargs)
+        if kwargs.get('json_result'):
+            return issues
+        return [DryRunIssue(issue, self) for issue in issues]
+
+    def create_issue(self, fields=None, **kwargs):
+        self._record('POST', 'issue', 'create')
+        self._record('GET', 'issue/{key}', 'read')
+        # What a new issue looks like to sync()
+        self._created += 1
+        key = "{}-NEW{}".format(fields['project'], self._created)
+        return DryRunIssue(SimpleNamespace(
+            key=key, id=key, raw={},
+            fields=SimpleNamespace(
+                summary=fields['summary'], labels=fields['labels'],
+                status=SimpleNamespace(name='Untriaged'),
+                priority=SimpleNamespace(name='Medium'),
+                customfield_10039=None, components=[], assignee=None)),
+            self)
+
+    def add_simple_link(self, issue, object):
+        self._record('POST', 'issue/{key}/remotelink', 'update')
+
+    def transition_issue(self, issue, transition, **kwargs):
+        # Transitions are looked up by name first
+        self._record('GET', 'issue/{key}/transitions', 'read')
+        self._record('POST', 'issue/{key}/transitions', 'transition')
+
+    def add_comment(self, issue, body, **kwargs):
+        self._record('POST', 'issue/{key}/comment', 'comment')
+
+    def add_issue_property(self, key, property_key, data):
+        self._record('PUT', 'issue/{key}/properties/{property}', 'update')
+
+    def _put(self, url, data=None, **kwargs):
+        # An issue edited by key, see BulkEdits
+        self._record('PUT', 'issue/{key}', 'update')
+
+    def _bulk_post(self, url, data=None, **kwargs):
+        self._record('POST', 'bulk/issues/fields', 'update')
+        self._bulk_edits.append(json.loads(data)['selectedIssueIdsOrKeys'])
+        task_id = len(self._bulk_edits)
+        return SimpleNamespace(json=lambda: {'taskId': task_id})
+
+    def _get_json(self, path, *args, **kwargs):
+        if not path.startswith('bulk/queue/'):
+            return self._jira._get_json(path, *args, **kwargs)
+        self._record('GET', 'bulk/queue/{id}', 'read')
+        keys = self._bulk_edits[int(path.split('/')[-1]) - 1]
+        return {'status': 'COMPLETE',
+                'processedAccessibleIssues': [self._ids.get(key)
+                                              for key in keys]}
@@ -0,0 +1,99 @@
+"""Interception point for every HTTP request the sync makes
+
+launchpadlib talks to Launchpad through httplib2 while jira, the team
+mapping download and our bulk LP reads go through requests. Both transports
+are patched to run each request through the same chain of hooks, which is
+what recording, replaying and profiling build upon.
+
+A hook is a callable taking (request, send) and returning the transport
+response: a requests.Response for the 'requests' transport or a
+(httplib2.Response, content) tuple for 'httplib2'. Calling send() performs
+the request with the remaining hooks.
+"""
+import threading
+from typing import NamedTuple, Optional
+
+
+class HTTPRequest(NamedTuple):
+    transport: str
+    method: str
+    url: str
+    body: Optional[bytes]
+
+
+_hooks = []
+_originals = {}
+_local = threading.local()
+
+
+def _dispatch(request, send):
+    # httplib2 follows redirects by calling itself again, only the outermost
+    # request goes through the hooks
+    if getattr(_local, 'active', False):
+        return send()
+
+    def chain(hooks):
+        if not hooks:
+            return send()
+        return hooks[0](request, lambda: chain(hooks[1:]))
+
+    _local.active = True
+    try:
+        return chain(list(_hooks))
+    finally:
+        _local.active = False
+
+
+def _as_bytes(body):
+    if isinstance(body, str):
+        return body.encode('utf-8')
+    return body
+
+
+def _patch():
+    from requests.adapters import HTTPAdapter
+    import httplib2
+
+    _originals['requests'] = HTTPAdapter.send
+    _originals['httplib2'] = httplib2.Http.request
+
+    def requests_send(adapter, request, *args, **kwargs):
+        return _dispatch(
+            HTTPRequest('requests', request.method, request.url,
+                        _as_bytes(request.body)),
+            lambda: _originals['requests'](adapter, request, *args, **kwargs))
+
+    def httplib2_request(http, uri, method="GET", body=None, *args,
+                         **kwargs):
+        return _dispatch(
+            HTTPRequest('httplib2', method, str(uri), _as_bytes(body)),
+            lambda: _originals['httplib2'](http, uri, method, body, *args,
+                                           **kwargs))
+
+    HTTPAdapter.send = requests_send
+    httplib2.Http.request = httplib2_request
+
+
+def _unpatch():
+    from requests.adapters import HTTPAdapter
+    import httplib2
+
+    HTTPAdapter.send = _originals.pop('requests')
+    httplib2.Http.request = _originals.pop('httplib2')
+
+
+def install(hook, first=False):
+    """Route all HTTP requests through hook, hooks installed first are
+    called first unless hook is to come before all of them"""
+    if not _hooks:
+        _patch()
+    if first:
+        _hooks.insert(0, hook)
+    else:
+        _hooks.append(hook)
+
+
+def uninstall(hook):
+    _hooks.remove(hook)
+    if not _hooks:
+        _unpatch()
@@ -0,0 +1,69 @@
+"""requests sessions shared by every HTTP client of the sync
+
+The Jira client, the team mapping download and the LP bulk reads all get
+their session from one SessionFactory, which sizes the connection pools for
+the concurrent workers, asks for compressed responses and applies a default
+timeout. Connections are kept alive between requests and the factory can
+tell how many requests reused one.
+
+launchpadlib keeps its own httplib2 connections and isn't covered.
+"""
+
+
+def _pooled_adapter(pool_size, timeout, retries):
+    from requests.adapters import HTTPAdapter
+
+    class PooledAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            if kwargs.get('timeout') is None:
+                kwargs['timeout'] = timeout
+            return super().send(request, **kwargs)
+
+    return PooledAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                         max_retries=retries)
+
+
+class SessionFactory:
+    def __init__(self, pool_size=10, timeout=60, retries=3):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.sessions = []
+
+    def session(self):
+        """Return a new session configured by the factory"""
+        import requests
+        return self.adopt(requests.Session())
+
+    def adopt(self, session):
+        """Configure a session created by a client library"""
+        adapter = _pooled_adapter(self.pool_size, self.timeout, self.retries)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Accept-Encoding'] = 'gzip, deflate'
+        session.headers['Connection'] = 'keep-alive'
+        self.sessions.append(session)
+        return session
+
+    def stats(self):
+        """Return the number of requests sent and of connections opened"""
+        requests = connections = 0
+        adapters = {id(adapter): adapter
+                    for session in self.sessions
+                    for adapter in session.adapters.values()}
+        for adapter in adapters.values():
+            poolmanager = getattr(adapter, 'poolmanager', None)
+            if poolmanager is None:
+                continue
+            for key in poolmanager.pools.keys():
+                pool = poolmanager.pools[key]
+                requests += pool.num_requests
+                connections += pool.num_connections
+        return requests, connections
+
+    def report(self):
+        requests, connections = self.stats()
+        return "HTTP: {} request{} over {} connection{} ({} reused)".format(
+            requests, "s" if requests > 1 else "",
+            connections, "s" if connections > 1 else "",
+            max(requests - connections, 0))
@@ -0,0 +1,33 @@
+from typing import NamedTuple, Optional
+
+
+# Issue entity property holding the fingerprint of the last synced LP state
+fingerprint_property = 'lp-to-jira-sync'
+
+
+def raw_fingerprint(raw):
+    """Return the fingerprint stored on an issue from its JSON, if any"""
+    properties = raw.get('properties') or {}
+    return (properties.get(fingerprint_property) or {}).get('fingerprint')
+
+
+class JiraIssue(NamedTuple):
+    """Compact entry of the index of the synced Jira issues
+
+    Only what is needed to reconcile an issue with its LP bugset is kept,
+    the full jira resource is loaded when the issue actually needs an update.
+    """
+    key: str
+    summary: str
+    status: str
+    fingerprint: Optional[str]
+
+    @classmethod
+    def from_raw(cls, raw):
+        """Index an issue from the JSON of a search result"""
+        fields = raw['fields']
+        return cls(
+            key=raw['key'],
+            summary=fields['summary'],
+            status=fields['status']['name'],
+            fingerprint=raw_fingerprint(raw))
@@ -0,0 +1,70 @@
+"""Local copy of the Jira issue index kept between runs
+
+An incremental run only asks Jira for the issues updated since the snapshot
+was taken, and for the keys of all the open synced issues so the ones
+deleted or moved to Done in the meantime can be dropped. Everything else is
+served from the snapshot.
+"""
+import json
+import os
+import time
+
+from lp_to_jira_sync.checkpoint import cache_dir
+from lp_to_jira_sync.jira_issue import JiraIssue
+
+
+def default_path(project, tag):
+    return os.path.join(cache_dir(), "{}-{}.jira.json".format(project, tag))
+
+
+class JiraSnapshot:
+    def __init__(self, path, project="", tag=""):
+        self.path = path
+        self.project = project
+        self.tag = tag
+        # time.time() when the issues were fetched from Jira
+        self.taken = None
+        self.issues = None
+
+    def load(self):
+        """Read the snapshot of the previous run, return False if there is
+        none to start from"""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+
+        if (data.get('project') != self.project
+                or data.get('tag') != self.tag):
+            return False
+
+        self.taken = data['taken']
+        self.issues = {
+            (bug_id, pkg): JiraIssue(*issue)
+            for bug_id, pkg, issue in data['issues']}
+        return True
+
+    def minutes_since(self, now=None):
+        """Minutes elapsed since the snapshot was taken, rounded up"""
+        elapsed = (now or time.time()) - self.taken
+        return max(int(-(-elapsed // 60)), 0)
+
+    def update(self, bugset, **fields):
+        """Reflect a change made by the run on an issue of the snapshot"""
+        if self.issues and bugset in self.issues:
+            self.issues[bugset] = self.issues[bugset]._replace(**fields)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # Written aside first, an interrupted save keeps the previous one
+        partial = self.path + '.partial'
+        with open(partial, 'w') as f:
+            json.dump({
+                'project': self.project,
+                'tag': self.tag,
+                'taken': self.taken,
+                'issues': [[bugset[0], bugset[1], list(issue)]
+                           for bugset, issue in self.issues.items()],
+            }, f)
+        os.replace(partial, self.path)
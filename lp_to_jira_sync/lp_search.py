@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from lp_to_jira_sync.lp_task import LPTask
+
+
+# Launchpad refuses batches bigger than this
+LP_MAX_PAGE_SIZE = 300
+
+
+class TaskSearch:
+    """A searchTasks query on Launchpad fetched page by page in parallel
+
+    Behave like the launchpadlib collection it replaces (len() and
+    iteration) but the first page tells us the total size so all the other
+    pages can be requested at once. Entries are turned into LPTask snapshots
+    as soon as a page is decoded.
+    """
+    def __init__(self, api_root, target, params,
+                 page_size=LP_MAX_PAGE_SIZE, workers=4, session=None,
+                 op='searchTasks'):
+        self.url = "{}{}".format(api_root, target)
+        # op=None reads a plain collection such as a bug's bug_tasks
+        self.params = dict(params)
+        if op:
+            self.params['ws.op'] = op
+        self.page_size = min(page_size, LP_MAX_PAGE_SIZE)
+        self.workers = max(workers, 1)
+        if session is None:
+            import requests
+            session = requests.Session()
+        self.session = session
+        self._first_page = None
+        self._total_size = None
+
+    def page_url(self, start):
+        params = dict(self.params, **{'ws.start': start,
+                                      'ws.size': self.page_size})
+        return "{}?{}".format(self.url, urlencode(params, doseq=True))
+
+    def fetch(self, url):
+        response = self.session.get(url)
+        response.raise_for_status()
+        return response.json()
+
+    def first_page(self):
+        if self._first_page is None:
+            self._first_page = self.fetch(self.page_url(0))
+        return self._first_page
+
+    def __len__(self):
+        if self._total_size is None:
+            page = self.first_page()
+            if 'total_size' in page:
+                self._total_size = page['total_size']
+            else:
+                # Big collections only link to their size
+                self._total_size = int(self.fetch(page['total_size_link']))
+        return self._total_size
+
+    def __iter__(self):
+        page = self.first_page()
+        for entry in page['entries']:
+            yield LPTask.from_dict(entry)
+
+        if 'next_collection_link' not in page:
+            return
+
+        starts = range(self.page_size, len(self), self.page_size)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pages = executor.map(self.fetch, map(self.page_url, starts))
+            for page in pages:
+                for entry in page['entries']:
+                    yield LPTask.from_dict(entry)
+
+
+class TaskSearches:
+    """Several TaskSearch read as one, their first pages are fetched
+    concurrently"""
+    def __init__(self, searches, workers=4):
+        self.searches = list(searches)
+        self.workers = max(workers, 1)
+        self._started = False
+
+    def _start(self):
+        if not self._started and self.searches:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(len, self.searches))
+        self._started = True
+
+    def __len__(self):
+        self._start()
+        return sum(len(search) for search in self.searches)
+
+    def __iter__(self):
+        self._start()
+        for search in self.searches:
+            yield from search
@@ -0,0 +1,55 @@
+from typing import NamedTuple, Optional
+
+
+class LPTask(NamedTuple):
+    """Immutable snapshot of the fields of a Launchpad bug task we sync
+
+    launchpadlib entries keep their whole JSON representation around and
+    may hit the network when a link such as task.bug is followed, so we copy
+    what we need as soon as a task is read and let the entry go.
+    """
+    bug_id: int
+    target_name: str
+    title: str
+    status: str
+    importance: str
+    assignee_link: Optional[str]
+    is_complete: bool
+    web_link: str
+
+    @classmethod
+    def from_entry(cls, task):
+        """Snapshot a launchpadlib bug_task entry"""
+        # It is much more efficient to parse the task title than accessing
+        # the LP API to get the bug id
+        return cls(
+            bug_id=int(task.title.split()[1][1:]),
+            target_name=task.bug_target_name,
+            title=task.title,
+            status=task.status,
+            importance=task.importance,
+            assignee_link=task.assignee_link,
+            is_complete=task.is_complete,
+            web_link=task.web_link)
+
+    @classmethod
+    def from_dict(cls, entry):
+        """Snapshot a bug_task entry as found in a raw LP collection page"""
+        return cls(
+            bug_id=int(entry['title'].split()[1][1:]),
+            target_name=entry['bug_target_name'],
+            title=entry['title'],
+            status=entry['status'],
+            importance=entry['importance'],
+            assignee_link=entry.get('assignee_link'),
+            is_complete=entry['is_complete'],
+            web_link=entry['web_link'])
+
+    @property
+    def package(self):
+        return self.target_name.split()[0]
+
+    @property
+    def bug_title(self):
+        # Task title looks like 'Bug #123 in pkg (Ubuntu): "bug title"'
+        return self.title[self.title.index(': "')+3:-1]
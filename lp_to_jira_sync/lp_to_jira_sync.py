@@ -1,8 +1,33 @@
 import argparse
+import functools
+import hashlib
+import json
+import math
+import re
+import time
 
 from lp_to_jira_sync.sync_config import SyncConfig
-from jira.resources import Issue
-from typing import Any
+from lp_to_jira_sync.lp_task import LPTask
+from lp_to_jira_sync.jira_issue import JiraIssue, fingerprint_property, \
+    raw_fingerprint
+from lp_to_jira_sync.lp_search import TaskSearch, TaskSearches, \
+    LP_MAX_PAGE_SIZE
+from lp_to_jira_sync.cassette import Cassette
+from lp_to_jira_sync.profiling import Profiler, profile_phase, profile_bugset
+from lp_to_jira_sync.checkpoint import Checkpoint
+from lp_to_jira_sync.checkpoint import default_path as checkpoint_path
+from lp_to_jira_sync.jira_snapshot import JiraSnapshot
+from lp_to_jira_sync.jira_snapshot import default_path as jira_snapshot_path
+from lp_to_jira_sync.bulk_edit import BulkEdits
+from lp_to_jira_sync.budget import RunBudget
+from lp_to_jira_sync.cost_estimate import CostEstimate, DryRunJira, \
+    estimate_phase
+from lp_to_jira_sync.normalize import canonical_title, canonical_checklist, \
+    find_name
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from jira.resources import Issue
 
 
 jira_priorities_mapping = {'Unknown': 'Medium',
@@ -13,17 +38,58 @@ jira_priorities_mapping = {'Unknown': 'Medium',
                            'Low': 'Low',
                            'Wishlist': 'Lowest'}
 
+# Most important first
+jira_priorities = ['Highest', 'High', 'Medium', 'Low', 'Lowest']
+
 Bugset = tuple[int, str]
 
+sponsors_team = 'ubuntu-sponsors'
+
+# Every synced issue carries the sync label plus one label for the bug id and
+# one for the package, labels are indexed and matched exactly by JQL unlike
+# the summary text search
+sync_label = 'lp-to-jira-sync'
+bug_label_prefix = 'lp-bug-'
+pkg_label_prefix = 'lp-pkg-'
+
+bug_id_re = re.compile(r'LP#(\d*)')
+
+
+def bugset_labels(bugset):
+    return [sync_label,
+            '{}{}'.format(bug_label_prefix, bugset[0]),
+            '{}{}'.format(pkg_label_prefix, bugset[1])]
+
+
+def labels_bugset(labels):
+    """Return the bugset stored in a list of Jira labels, None if missing"""
+    bug_id = pkg = None
+    for label in labels or []:
+        if label.startswith(bug_label_prefix):
+            bug_id = label[len(bug_label_prefix):]
+        elif label.startswith(pkg_label_prefix):
+            pkg = label[len(pkg_label_prefix):]
+
+    if not bug_id or not bug_id.isdigit() or not pkg:
+        return None
+
+    return (int(bug_id), pkg)
+
+
+def bugset_jql(bugset):
+    return 'labels = "{}{}" AND labels = "{}{}"'.format(
+        bug_label_prefix, bugset[0], pkg_label_prefix, bugset[1])
+
+
 # Create a Jira Entry from a LP bugset (list of tasks relevant to a bug and
 # package)
 def lp_to_jira_bug(sync_bug_id, sync_bug_tasks, config):
-    """Create JIRA issue at project_id for a given Launchpad bug"""
+    """Create JIRA issue at project_id for a given Launchpad bug, the caller
+    checked with is_bug_in_jira() that there is none"""
 
-    if is_bug_in_jira(config.jira, sync_bug_id, config.project):
-        return
-
-    lpbug = sync_bug_tasks[0].bug
+    # Only fetch the full bug when creating an issue, snapshots don't carry
+    # the description
+    lpbug = config.lp.bugs[sync_bug_tasks[0].bug_id]
 
     summary = 'LP#{} [{}] {}'.format(
         sync_bug_id[0], sync_bug_id[1],lpbug.title)
@@ -34,7 +100,8 @@ def lp_to_jira_bug(sync_bug_id, sync_bug_tasks, config):
         'project': config.project,
         'summary': summary[:255],
         'description': lpbug.description[:32767],
-        'issuetype': {'name': 'Bug'}
+        'issuetype': {'name': 'Bug'},
+        'labels': bugset_labels(sync_bug_id)
     }
 
     jira_issue = config.jira.create_issue(fields=issue_dict)
@@ -52,16 +119,8 @@ def lp_to_jira_bug(sync_bug_id, sync_bug_tasks, config):
 
 def get_bug_id(summary):
     "Extract the bug id from a jira title which would include LP#"
-    id = ""
-
-    if summary and "LP#" in summary:
-        for char in summary[summary.find("LP#")+3:]:
-            if char.isdigit():
-                id = id + char
-            else:
-                break
-
-    return id
+    match = bug_id_re.search(summary or "")
+    return match.group(1) if match else ""
 
 
 def get_bug_pkg(summary):
@@ -75,14 +134,31 @@ def get_bug_pkg(summary):
     return id
 
 
-def is_bug_in_jira(jira, bug_id, project_id):
+def summary_bugset(summary):
+    """Return the bugset in the title of an issue synced before the bugset
+    labels, None if missing"""
+    lpbug_id = get_bug_id(summary)
+    lppkg = get_bug_pkg(summary)
+    if not lpbug_id or not lppkg:
+        return None
+
+    return (int(lpbug_id), lppkg)
+
+
+def is_bug_in_jira(jira, bug_id, project_id, by_title=True):
     """Checks Jira for the same ID as the Bug you're trying to import"""
 
-    request = "project = \"{}\" AND summary ~ '\"LP#{} [{}]\"'".format(
-        project_id, bug_id[0], bug_id[1])
+    request = "project = \"{}\" AND {}".format(project_id, bugset_jql(bug_id))
 
     existing_issue = jira.search_issues(request)
 
+    if not existing_issue and by_title:
+        # Issues created before the bugset labels and not backfilled yet
+        # can only be found from their title
+        request = "project = \"{}\" AND summary ~ '\"LP#{} [{}]\"'".format(
+            project_id, bug_id[0], bug_id[1])
+        existing_issue = jira.search_issues(request)
+
     if existing_issue:
         return existing_issue[0]
 
@@ -121,20 +197,22 @@ def checklist(bugtasks):
     if not bugtasks:
         return None
 
-    checklist_str = "# Default checklist"
-    for task in bugtasks:
+    # No Checklist if only one serie impacted
+    if len(bugtasks) < 2:
+        return None
+
+    items = []
+    # LP doesn't return the series in a stable order, and a series keeps
+    # its place in the checklist when its task completes
+    for task in sorted(bugtasks, key=lambda task: task.target_name):
         checked = "done" if task.is_complete else "open"
-        checklist_str = checklist_str + "\n* [{}] {} - {} - {}".format(
+        items.append("* [{}] {} - {} - {}".format(
             checked,
             task.title.split(":")[0].split("in ")[1],
             task.status,
-            task.importance)
+            task.importance))
 
-    # No Checklist if only one serie impacted
-    if len(bugtasks) > 1:
-        return checklist_str
-
-    return None
+    return "\n".join(["# Default checklist"] + items)
 
 # return the list of taskset in the following format
 # taskset is a relevant set of task for a bug/package combination
@@ -142,75 +220,397 @@ def checklist(bugtasks):
 # {(bug_id, package):[lp tasks]}
 
 
+# Order of the importances in LP searches, most important first
+lp_importances = ['Unknown', 'Critical', 'High', 'Medium', 'Low', 'Wishlist',
+                  'Undecided']
+
+
+def task_order(task):
+    importance = (lp_importances.index(task.importance)
+                  if task.importance in lp_importances
+                  else len(lp_importances))
+    return importance, task.target_name
+
+
 def refine_tasks(tasks, config):
+    # Membership is tested for every task, the team can own thousands of
+    # packages
+    restricted_pkgs = set(config.restricted_pkgs)
+    special_packages = set(config.special_packages)
+
     results = {}
     for task in tasks:
-        # It is much more efficient to parse the task title than accessing the
-        # LP API to get the bug id
-        title = task.title.split()
-        name = task.bug_target_name.split()[0]
+        # Keep a compact snapshot so the launchpadlib entry can be released
+        if not isinstance(task, LPTask):
+            task = LPTask.from_entry(task)
+        name = task.package
 
         # Create the taskset identifier
-        pair = (int(title[1][1:]), name)
-        if pair not in results:
-            results[pair] = []
-
-        # If package is in Ubuntu and belong to the relevant team
-        if ("(Ubuntu" in task.bug_target_name
-                and name in config.restricted_pkgs):
-            results[pair].append(task)
-        elif name in config.special_packages:
-            results[pair].append(task)
-        else:
-            del results[pair]
+        pair = (task.bug_id, name)
+
+        # If package is in Ubuntu and belong to the relevant team, other
+        # tasks are skipped whatever the order they come in
+        if ("(Ubuntu" in task.target_name
+                and name in restricted_pkgs):
+            results.setdefault(pair, []).append(task)
+        elif name in special_packages:
+            results.setdefault(pair, []).append(task)
+
+    # The search plan decides the order of the tasks, a taskset starts with
+    # its most important task whatever the plan
+    for taskset in results.values():
+        taskset.sort(key=task_order)
 
     # remove bugtasks where all the task are Fix Released
-    results_copy = results.copy()
-    for bugtask in results:
-        complete = True
-        for task in results[bugtask]:
-            if task.status != 'Fix Released':
-                complete = False
-                break
-        if complete:
-            del results_copy[bugtask]
+    return {bugtask: taskset for bugtask, taskset in results.items()
+            if not all(task.status == 'Fix Released' for task in taskset)}
+
+
+# Every status of a bug task. A bug is found from its packages whatever the
+# status of their task, the status filter applies to all the tasks of the bug
+# as it does in the global search
+all_statuses = ['New', 'Incomplete', 'Opinion', 'Invalid', "Won't Fix",
+                'Expired', 'Confirmed', 'Triaged', 'In Progress', 'Deferred',
+                'Fix Committed', 'Fix Released', 'Does Not Exist']
+
+
+def lp_targets(config, package):
+    """Return the LP API paths of the targets a package's bugs are on"""
+    targets = ['ubuntu/+source/{}'.format(package)]
+    # Special packages are tracked upstream as well as in Ubuntu
+    if package in config.special_packages:
+        targets.append(package)
+    return targets
+
+
+def search_lp_tasks(config, statuses):
+    """Return the tagged LP tasks in the scope of the run, narrowing the
+    search on the LP side when the run is restricted to a bug or packages"""
+    params = {'tags': config.tag, 'status': statuses}
+
+    if config.scope_bug:
+        tasks = bug_tasks(config, [config.scope_bug], statuses)
+        bug = tasks.searches[0].fetch('{}bugs/{}'.format(
+            config.lp_api_root, config.scope_bug))
+        if config.tag not in bug['tags']:
+            return []
+    elif config.scope_packages:
+        tasks = package_tasks(config, config.scope_packages, params)
+    else:
+        return plan_lp_search(config, params)
+
+    return [task for task in tasks
+            if task.status in statuses and (
+                not config.scope_packages or
+                task.package in config.scope_packages)]
+
+
+def package_searches(config, packages, params):
+    """Search the bugs of packages on all their targets, whatever the status
+    of their tasks"""
+    return TaskSearches(
+        [TaskSearch(config.lp_api_root, target,
+                    dict(params, status=all_statuses),
+                    page_size=config.lp_page_size, workers=config.lp_workers,
+                    session=config.http_session)
+         for package in packages for target in lp_targets(config, package)],
+        workers=config.lp_workers)
+
+
+def bug_tasks(config, bug_ids, statuses):
+    """Read all the tasks of bugs, series tasks included, keeping the ones
+    with one of statuses"""
+    return TaskSearches(
+        [TaskSearch(config.lp_api_root, 'bugs/{}/bug_tasks'.format(bug_id),
+                    {}, op=None, page_size=config.lp_page_size,
+                    workers=config.lp_workers, session=config.http_session)
+         for bug_id in bug_ids],
+        workers=config.lp_workers)
+
+
+def package_tasks(config, packages, params):
+    """Return the tasks the global search of the tag would return for the
+    bugs of packages
+
+    A package search only returns the task on the searched target, the
+    series tasks and the tasks on other targets are read from each bug.
+    """
+    bugs = sorted({task.bug_id for task in package_searches(
+        config, packages, params)})
+    return [task for task in bug_tasks(config, bugs, params['status'])
+            if task.status in params['status']]
+
+
+def plan_lp_search(config, params):
+    """Choose between one global search of the tag and searching the bugs
+    of each package of the team, whichever needs the fewest requests
+
+    Tasks of packages the team doesn't own are dropped by refine_tasks, on
+    popular tags most of the global search is downloaded for nothing. Both
+    plans return the same tasks.
+    """
+    search = TaskSearch(config.lp_api_root, 'bugs', params,
+                        page_size=config.lp_page_size,
+                        workers=config.lp_workers,
+                        session=config.http_session)
+    packages = config.restricted_pkgs + [
+        package for package in config.special_packages
+        if package not in config.restricted_pkgs]
+
+    # Its first page tells the size of the global search, the remaining
+    # pages are compared to at least one request per package target and
+    # then one per bug found
+    global_cost = math.ceil(len(search) / search.page_size) - 1
+    searches = package_searches(config, packages, params)
+    if not packages or len(searches.searches) >= global_cost:
+        return search
+
+    # Decided from their first pages only, there are at most as many bugs
+    # as tasks found and reading the other pages would be wasted if the
+    # global search still wins
+    if len(searches.searches) + len(searches) >= global_cost:
+        return search
+
+    bugs = sorted({task.bug_id for task in searches})
+
+    print(" - Searching the bugs of {} packages one by one rather than {} "
+          "pages of bug tasks".format(len(packages), global_cost + 1))
+    return [task for task in bug_tasks(config, bugs, params['status'])
+            if task.status in params['status']]
+
+
+def scope_jql(config):
+    """JQL restricting the synced issues to the scope of the run"""
+    clauses = []
+    if config.scope_bug:
+        clauses.append('labels = "{}{}"'.format(
+            bug_label_prefix, config.scope_bug))
+    if config.scope_packages:
+        clauses.append('labels in ({})'.format(", ".join(
+            '"{}{}"'.format(pkg_label_prefix, package)
+            for package in config.scope_packages)))
+    return " AND ".join(clauses)
+
+
+def find_sponsored_bugs(config, statuses):
+    """Return the ids of the tagged bugs ubuntu-sponsors is subscribed to"""
+    search = TaskSearch(
+        config.lp_api_root, 'bugs',
+        {'tags': config.tag,
+         'status': statuses,
+         'bug_subscriber': '{}~{}'.format(config.lp_api_root, sponsors_team)},
+        page_size=config.lp_page_size,
+        workers=config.lp_workers,
+        session=config.http_session)
+
+    return {task.bug_id for task in search}
+
+
+def search_jira(jira_api, request, batch=50, **kwargs):
+    """Yield the raw JSON issues matching the JQL request, fetched by batches"""
+    start = 0
+    while True:
+        issues = jira_api.search_issues(
+            request, startAt=start, maxResults=batch, json_result=True,
+            **kwargs)['issues']
+
+        if not issues:
+            break
+
+        # Jira may cap the batch size, continue from what was returned
+        start += len(issues)
+        yield from issues
 
-    return results_copy
 
+def synced_issues_jql(project, scope="", unlabelled=False):
+    synced = "labels = \"{}\"".format(sync_label)
+    if unlabelled:
+        # Issues synced before the bugset labels are only known by their
+        # title
+        synced = "({} OR summary ~ \"LP#\")".format(synced)
+    request = "project = {} " \
+        "AND type = Bug " \
+        "AND {} " \
+        "AND status not in (Done, \"Rejected\")".format(project, synced)
+    if scope:
+        request += " AND {}".format(scope)
+    return request
 
-def find_bugs_in_jira_project(jira_api, project):
+
+def find_bugs_in_jira_project(jira_api, project, scope="", unlabelled=False):
     if not jira_api or not project:
         return {}
 
-    # Get JIRA issues in batch of 50
-    issue_index = 0
-    issue_batch = 50
-
     found_issues = {}
 
-    while True:
-        start_index = issue_index * issue_batch
-        request = "project = {} " \
-            "AND type = Bug " \
-            "AND summary ~ \"LP#\" " \
-            "AND status not in (Done, \"Rejected\")""".format(project)
-        issues = jira_api.search_issues(request, startAt=start_index)
+    # Only what's needed to match bugsets and skip the ones up to date,
+    # issues needing a sync are loaded in full later
+    issues = search_jira(
+        jira_api, synced_issues_jql(project, scope, unlabelled),
+        fields='summary,status,labels',
+        properties=fingerprint_property)
+
+    # For each synced issue in JIRA
+    for issue in issues:
+        bugset = labels_bugset(issue['fields']['labels'])
+
+        if bugset:
+            found_issues[bugset] = JiraIssue.from_raw(issue)
+        elif unlabelled:
+            bugset = summary_bugset(issue['fields']['summary'])
+            # A labelled issue of the same bugset wins
+            if bugset and bugset not in found_issues:
+                found_issues[bugset] = JiraIssue.from_raw(issue)
 
-        if not issues:
-            break
+    return found_issues
 
-        issue_index += 1
 
-        # For each issue in JIRA with LP# in the title
-        for issue in issues:
-            summary = issue.fields.summary
-            lpbug_id = get_bug_id(summary)
-            lppkg = get_bug_pkg(summary)
+def find_jira_keys(jira_api, project, scope="", unlabelled=False):
+    """Return the keys of the open synced issues, nothing else is fetched"""
+    return {issue['key'] for issue in search_jira(
+        jira_api, synced_issues_jql(project, scope, unlabelled), batch=1000,
+        fields='key')}
 
-            if lpbug_id:
-                found_issues[(int(lpbug_id), lppkg)] = issue
 
-    return found_issues
+# Minutes added to the window of an incremental fetch, Jira indexes updated
+# issues asynchronously and they may have been missed by the previous run
+jira_snapshot_margin = 5
+
+
+def fetch_jira_issues(config, scope=""):
+    """Return the Jira issue index, refreshed from the snapshot of the
+    previous run when there is one"""
+    snapshot = config.jira_snapshot
+    taken = time.time()
+
+    # Until they are labelled, issues synced before the bugset labels are
+    # indexed by their title
+    if config.unlabelled_issues is None:
+        config.unlabelled_issues = has_unlabelled_issues(config)
+
+    if snapshot and snapshot.load():
+        issues = refresh_jira_issues(config, snapshot, scope)
+    else:
+        issues = find_bugs_in_jira_project(
+            config.jira, config.project, scope, config.unlabelled_issues)
+
+    if snapshot:
+        # process_issues consumes the index, the snapshot keeps its own copy
+        snapshot.taken = taken
+        snapshot.issues = dict(issues)
+
+    return issues
+
+
+def refresh_jira_issues(config, snapshot, scope=""):
+    def clause(jql):
+        return " AND ".join(filter(None, [scope, jql]))
+
+    minutes = snapshot.minutes_since() + jira_snapshot_margin
+    unlabelled = config.unlabelled_issues
+    updated = find_bugs_in_jira_project(
+        config.jira, config.project,
+        clause('updated >= "-{}m"'.format(minutes)), unlabelled)
+    print(" - {} issue{} updated in Jira in the last {} minutes".format(
+        len(updated), "s" if len(updated) > 1 else "", minutes))
+
+    # Issues deleted, moved to Done or unlabelled are no longer listed
+    open_keys = find_jira_keys(config.jira, config.project, scope, unlabelled)
+    # and an updated issue may now belong to another bugset
+    updated_keys = {issue.key for issue in updated.values()}
+
+    issues = {bugset: issue for bugset, issue in snapshot.issues.items()
+              if issue.key in open_keys and issue.key not in updated_keys}
+    issues.update(updated)
+
+    # Open issues the snapshot never had, they are not expected but must not
+    # be mistaken for missing ones
+    missing = open_keys - {issue.key for issue in issues.values()}
+    if missing:
+        issues.update(find_bugs_in_jira_project(
+            config.jira, config.project,
+            clause("key in ({})".format(", ".join(sorted(missing)))),
+            unlabelled))
+
+    return issues
+
+
+def unlabelled_jql(project):
+    return "project = {} " \
+        "AND summary ~ \"LP#\" " \
+        "AND (labels is EMPTY OR labels != \"{}\")".format(
+            project, sync_label)
+
+
+def has_unlabelled_issues(config):
+    """Whether issues synced before the bugset labels are left, only they
+    need to be looked up by their title"""
+    result = config.jira.search_issues(
+        unlabelled_jql(config.project), maxResults=1, fields='key',
+        json_result=True)
+    return result['total'] > 0
+
+
+def backfill_labels(config):
+    """Add the bugset labels to issues synced before they existed"""
+    # Labelled issues leave the results so fetch them all before updating
+    issues = config.jira.search_issues(
+        unlabelled_jql(config.project), maxResults=False)
+
+    print("Found {} issue{} without bugset labels".format(
+        len(issues), "s" if len(issues) > 1 else ""))
+
+    for issue in issues:
+        bugset = summary_bugset(issue.fields.summary)
+        if not bugset:
+            print("-> Skipping {}, no bugset in '{}'".format(
+                issue.key, issue.fields.summary))
+            continue
+
+        labels = bugset_labels(bugset)
+        print("-> Labelling {} with {}".format(issue.key, ", ".join(labels)))
+        if not config.dry_run:
+            issue.update(fields={
+                'labels': issue.fields.labels + [
+                    label for label in labels
+                    if label not in issue.fields.labels]})
+
+
+def desired_state(taskset, config):
+    """What the Jira issue of a bugset should look like according to LP"""
+    lp_who = lp_assignee(taskset)
+    assignee = None
+    if config.team_ids and lp_who in config.team_ids:
+        assignee = config.team_ids[lp_who]['id']
+
+    component = None
+    if config.jira_components:
+        component = config.package_to_component(taskset[0].package)
+
+    return {
+        'title': canonical_title(taskset[0].bug_title),
+        'checklist': checklist(taskset),
+        'priority': jira_priorities_mapping[lp_importance(taskset)],
+        'assignee': assignee,
+        'component': component,
+        'sponsoring': taskset[0].bug_id in config.sponsored_bugs,
+    }
+
+
+def fingerprint(taskset, config):
+    state = json.dumps(desired_state(taskset, config), sort_keys=True)
+    return hashlib.sha1(state.encode('utf-8')).hexdigest()[:16]
+
+
+def issue_fingerprint(issue):
+    return raw_fingerprint(issue.raw)
+
+
+def is_up_to_date(taskset, issue, config):
+    """Tell if an indexed issue was synced from the current LP state, from
+    the fingerprint stored on it and without looking at the synced fields"""
+    return (issue.status != 'Untriaged'
+            and issue.fingerprint == fingerprint(taskset, config))
 
 
 def jira_assignee(issue):
@@ -231,7 +631,8 @@ def sync(taskset, issue, config, log_msg = ""):
     if not taskset or not issue or not config:
         return False
 
-    bug = taskset[0].bug
+    bug_id = taskset[0].bug_id
+    state_fingerprint = fingerprint(taskset, config)
     jira_comment = ""
     synced = False
 
@@ -242,48 +643,56 @@ def sync(taskset, issue, config, log_msg = ""):
             synced = True
         print(msg)
 
+    # Labels
+    # Issues synced before the bugset labels are labelled on their next sync
+    labels = issue.fields.labels or []
+    if labels_bugset(labels) is None:
+        log("-> Labelling {} with its bugset".format(issue.key))
+        issue.update(fields={'labels': labels + [
+            label for label in bugset_labels((bug_id, taskset[0].package))
+            if label not in labels]})
+
     # Title
     # Title may change in LP and we want to make sure
     # it match the title in Jira
     # TODO: write sync title function
+    # Titles only differing by their spacing are the same
     jira_title = issue.fields.summary
-    new_title = jira_title[:jira_title.index(']')+2] + bug.title
-    
-    if jira_title not in new_title:
+    new_title = canonical_title(
+        jira_title[:jira_title.index(']')+2] + taskset[0].bug_title)
+
+    if canonical_title(jira_title) not in new_title:
         log("-> Syncing title for {}".format(issue.key))
         jira_comment = jira_comment + (
             ('{{lp-to-jira-sync}} Fixed out of sync title with LP: #%s\n')
-            % (bug.id)
+            % (bug_id)
         )
         issue.update(summary=new_title[:255])
 
     # Status
-    # At this stage at a minimum the issue should be in Triaged but other
-    # status could be possible in the future Sponsoring Needed could be
-    # selected if Ubuntu Sponsor team is subsribed
+    # At this stage at a minimum the issue should be in Triaged, or in
+    # Sponsoring Needed if Ubuntu Sponsor team is subscribed to the bug.
+    # Subscriptions are looked up once per run (see find_sponsored_bugs) and
+    # a bug might be subscribed by ubuntu sponsors for another task than the
+    # one we care about
     # In Progress ?
     # TODO write sync status function
-    if False:
-        # disabling this code for now as I'm not sure it is worth it
-        # it slows the execuition for all the bug and a bug might be
-        # subscriobed by ubuntu sponsors for another task than the one we
-        # care about
-        sponsor = 'https://api.launchpad.net/devel/~ubuntu-sponsors'
-        if sponsor in [x['person_link']
-                       for x in bug.subscriptions.entries]:
-            log(" - Fixing status to Sponsoring Needed")
-            jira_comment = jira_comment + (
-                ('{{lp-to-jira-sync}} ubuntu sponsors team is subscribed '
-                 'to the bug which means it should move to Sponsoring '
-                 'Needed')
-            )
-            config.jira.transition_issue(
-                issue,
-                transition='Sponsoring Needed'
-            )
+    if (bug_id in config.sponsored_bugs and
+            issue.fields.status.name in ('Untriaged', 'Triaged')):
+        log("-> Updating Status for {} to Sponsoring Needed".format(
+            issue.key))
+        jira_comment = jira_comment + (
+            ('{{lp-to-jira-sync}} ubuntu sponsors team is subscribed '
+             'to the bug which means it should move to Sponsoring '
+             'Needed\n')
+        )
+        config.jira.transition_issue(
+            issue,
+            transition='Sponsoring Needed'
+        )
 
     # sync Status
-    if issue.fields.status.name == 'Untriaged':
+    elif issue.fields.status.name == 'Untriaged':
         log("-> Updating Status for {} to Triaged".format(issue.key))
         jira_comment = jira_comment + (
            ('{{lp-to-jira-sync}} %s should be Triaged\n') % (config.tag)
@@ -298,12 +707,13 @@ def sync(taskset, issue, config, log_msg = ""):
     # Jira issue that list all series
     checkstr = checklist(taskset)
     jiracheckstr = issue.fields.customfield_10039
-    if checkstr and checkstr != jiracheckstr:
+    if checkstr and (canonical_checklist(checkstr)
+                     != canonical_checklist(jiracheckstr)):
         log("-> Updating Checklist for {}".format(issue.key))
         issue.update(fields={'customfield_10039': checkstr})
         jira_comment = jira_comment + (
             ('{{lp-to-jira-sync}} Updating Checklist according to LP: #%s\n')
-            % (bug.id)
+            % (bug_id)
         )
 
     # Assignee
@@ -325,7 +735,7 @@ def sync(taskset, issue, config, log_msg = ""):
                     config.team_ids[lp_who]['name']))
                 jira_comment = jira_comment + (
                     ('{{lp-to-jira-sync}} Updating Assignee according to '
-                     'LP: #%s\n') % (bug.id)
+                     'LP: #%s\n') % (bug_id)
                 )
 
     # Importance
@@ -335,10 +745,13 @@ def sync(taskset, issue, config, log_msg = ""):
     if importance != priority:
         log("-> Syncing Priority for {} to {}".format(
             issue.key, importance))
-        issue.update(priority={"name": importance})
+        if config.bulk_edits:
+            config.bulk_edits.add(issue, 'priority', importance)
+        else:
+            issue.update(priority={"name": importance})
         jira_comment = jira_comment + (
             ('{{lp-to-jira-sync}} Updating Priority according to LP: #%s\n')
-            % (bug.id)
+            % (bug_id)
         )
 
     # Sync Jira Component with Package in Launchpad if mapping available
@@ -347,32 +760,44 @@ def sync(taskset, issue, config, log_msg = ""):
         # remove sneaky trailing ':'
         if pkg_name[-1] == ':':
             pkg_name = pkg_name[:-1]
-        # Retrieve the proper LP component
+        # Retrieve the proper LP component, as spelled in the Jira project
         component = config.package_to_component(pkg_name)
+        if component:
+            component = find_name(component, config.jira_components)
         # Retrieve the Jira components if any
         issue_components = [x.name for x in issue.fields.components]
 
-        # If there is a LaunchPad component and it isn't already set in Jira
-        # and is an available Component on the Jira project
-        if (
-            component and
-            component not in issue_components and
-            component in config.jira_components
-        ):
+        # If there is a LaunchPad component available on the Jira project
+        # and it isn't already set in Jira
+        if component and not find_name(component, issue_components):
             log("-> Updating Components for {} to {}"
                   .format(issue.key, component))
-            issue.update(fields={"components": []})
-            issue.update(
-                update={"components": [{"add": {"name": component, }}], }, )
+            if config.bulk_edits:
+                config.bulk_edits.add(issue, 'components', component)
+            else:
+                issue.update(fields={"components": []})
+                issue.update(
+                    update={"components": [{"add": {"name": component, }}], }, )
             jira_comment = jira_comment + (
                 ('{{lp-to-jira-sync}} Updating Component according to '
-                 'LP: #%s\n') % (bug.id)
+                 'LP: #%s\n') % (bug_id)
             )
 
     if jira_comment:
         config.jira.add_comment(issue, jira_comment)
 
-def revert_jira_status(config: SyncConfig, jira_issue: Issue, tasks: list):
+    if issue_fingerprint(issue) != state_fingerprint:
+        # The issue is only up to date once its queued edits are sent
+        record = functools.partial(
+            config.jira.add_issue_property,
+            issue.key, fingerprint_property,
+            {'fingerprint': state_fingerprint})
+        if config.bulk_edits:
+            config.bulk_edits.defer(issue.key, record)
+        else:
+            record()
+
+def revert_jira_status(config: SyncConfig, jira_issue: 'Issue', tasks: list):
     not_progressing = (t for t in tasks if t.status in (
         'New',
         'Confirmed',
@@ -396,7 +821,29 @@ def revert_jira_status(config: SyncConfig, jira_issue: Issue, tasks: list):
         config.jira.add_comment(jira_issue, comment)
 
 
-def process_issues(all_tasks: dict[Bugset, list], all_issues: dict[Bugset, Issue], config):
+def schedule_bugsets(all_tasks, all_issues, config):
+    """Order the bugsets so that a run cut short by its budget has spent
+    it on the most important changes"""
+    def order(bugset):
+        taskset = all_tasks[bugset]
+        priority = jira_priorities_mapping.get(
+            lp_importance(taskset), 'Medium')
+        if bugset not in all_issues:
+            # Not in Jira yet
+            change = 0
+        elif not is_up_to_date(taskset, all_issues[bugset], config):
+            change = 1
+        else:
+            # Costs no write, whatever its priority
+            change = 2
+        # then the oldest bugs first
+        return (change == 2, jira_priorities.index(priority), change,
+                bugset[0])
+
+    return sorted(all_tasks, key=order)
+
+
+def process_issues(all_tasks: dict[Bugset, list], all_issues: dict[Bugset, JiraIssue], config):
     # Between All subscribed bug in LP and all bug imported in JIRA, there's
     # 3 Groups:
     #   A: bug are active in both LP and Jira
@@ -418,54 +865,123 @@ def process_issues(all_tasks: dict[Bugset, list], all_issues: dict[Bugset, Issue
     #   For now we will go the hard way and REJECT any bug in Jira that isn't
     #   tagged
 
+    checkpoint = config.checkpoint
+    budget = config.budget
+
+    pending = {}
     for bugset in all_tasks:
-        if bugset in all_issues:
-            # bug are active in both LP and Jira
-            log_msg = ("LP-Jira: LP: #{} [{}] is in Jira as {}"
-                  .format(bugset[0], bugset[1], all_issues[bugset].key))
-            if not config.dry_run:
-                sync(
-                    all_tasks[bugset],
-                    all_issues[bugset],
-                    config,
-                    log_msg)
-            del all_issues[bugset]
+        if checkpoint and checkpoint.is_done(bugset):
+            # Completed before the previous run was interrupted
+            all_issues.pop(bugset, None)
         else:
-            # bugs only active in LP
-            log_msg = ("LP Only: LP: #{} [{}] is not active in Jira"
-                  .format(bugset[0], bugset[1]))
-
-            # Checking if the bug is inactive in Jira
-            jira_issue = is_bug_in_jira(config.jira, bugset, config.project)
-            if jira_issue and str(jira_issue.fields.status) in ('Done', 'Rejected'):
-                revert_jira_status(config, jira_issue, all_tasks[bugset])
+            pending[bugset] = all_tasks[bugset]
+
+    exhausted = None
+    scheduled = schedule_bugsets(pending, all_issues, config)
+    for index, bugset in enumerate(scheduled):
+        exhausted = budget and budget.exhausted(
+            config.bulk_edits.pending_writes() if config.bulk_edits else 0)
+        if exhausted:
+            left = len(scheduled) - index
+            print("Run budget exhausted after {}, {} bugset{} left for the "
+                  "next run".format(exhausted, left, "s" if left > 1 else ""))
+            break
+
+        key = None
+        with profile_bugset(config.profiler, bugset):
+            if bugset in all_issues:
+                # bug are active in both LP and Jira
+                key = all_issues[bugset].key
+                log_msg = ("LP-Jira: LP: #{} [{}] is in Jira as {}"
+                      .format(bugset[0], bugset[1], all_issues[bugset].key))
+                if (not config.dry_run and not is_up_to_date(
+                        all_tasks[bugset], all_issues[bugset], config)):
+                    sync(
+                        all_tasks[bugset],
+                        config.jira.issue(all_issues[bugset].key,
+                                          properties=fingerprint_property),
+                        config,
+                        log_msg)
+                    if config.jira_snapshot:
+                        config.jira_snapshot.update(
+                            bugset,
+                            fingerprint=fingerprint(all_tasks[bugset], config))
+                del all_issues[bugset]
             else:
+                # bugs only active in LP
+                log_msg = ("LP Only: LP: #{} [{}] is not active in Jira"
+                      .format(bugset[0], bugset[1]))
+
+                # Checking if the bug is inactive in Jira
+                if config.unlabelled_issues is None:
+                    # Once per run rather than a title search per new bug
+                    config.unlabelled_issues = has_unlabelled_issues(config)
+                jira_issue = is_bug_in_jira(
+                    config.jira, bugset, config.project,
+                    by_title=config.unlabelled_issues)
+                if jira_issue and str(jira_issue.fields.status) in ('Done', 'Rejected'):
+                    revert_jira_status(config, jira_issue, all_tasks[bugset])
+                elif not jira_issue:
+                    if not config.dry_run:
+                        jira_issue = lp_to_jira_bug(
+                                        bugset, all_tasks[bugset], config)
+                    else:
+                        pass
+                # else open but not indexed, like issues out of the scope
+                # still unlabelled, it is synced as found
+
                 if not config.dry_run:
-                    jira_issue = lp_to_jira_bug(
-                                    bugset, all_tasks[bugset], config)
-                else:
-                    pass
+                    sync(
+                        all_tasks[bugset],
+                        jira_issue,
+                        config,
+                        log_msg)
+                if jira_issue:
+                    key = jira_issue.key
+
+        if checkpoint:
+            complete = functools.partial(checkpoint.complete, bugset)
+            if config.bulk_edits and key:
+                # A resumed run must not skip edits that were never sent
+                config.bulk_edits.defer(key, complete, writes=0)
+            else:
+                complete()
 
-            if not config.dry_run:
-                sync(
-                    all_tasks[bugset],
-                    jira_issue,
-                    config,
-                    log_msg)
+    if config.bulk_edits:
+        config.bulk_edits.flush()
+
+    if exhausted:
+        # The bugsets left are still in all_issues, they are not Jira only
+        return
 
     for issue in all_issues:
-        # bugs only active in Jira
-        print((
-                'Jira Only: LP: #{} [{}] is in Jira as {} but not tagged or '
-                'active in LP').format(
-            issue[0], issue[1],  all_issues[issue].key))
-        comment = (
-            '{{lp-to-jira-sync}} LP: #%s is either not tagged %s or active at '
-            'this time. Moving issue to Done. If this is incorrect, check the '
-            'status of the bug in LaunchPad.') % (issue[0], config.tag)
-        if not config.dry_run:
-            config.jira.transition_issue(all_issues[issue], transition="Done")
-            config.jira.add_comment(all_issues[issue], comment)
+        if checkpoint and checkpoint.is_done(issue):
+            continue
+
+        exhausted = budget and budget.exhausted()
+        if exhausted:
+            print("Run budget exhausted after {}, issues only active in "
+                  "Jira are left for the next run".format(exhausted))
+            break
+
+        with profile_bugset(config.profiler, issue):
+            # bugs only active in Jira
+            print((
+                    'Jira Only: LP: #{} [{}] is in Jira as {} but not tagged '
+                    'or active in LP').format(
+                issue[0], issue[1],  all_issues[issue].key))
+            comment = (
+                '{{lp-to-jira-sync}} LP: #%s is either not tagged %s or '
+                'active at this time. Moving issue to Done. If this is '
+                'incorrect, check the status of the bug in LaunchPad.'
+                ) % (issue[0], config.tag)
+            if not config.dry_run:
+                config.jira.transition_issue(
+                    all_issues[issue].key, transition="Done")
+                config.jira.add_comment(all_issues[issue].key, comment)
+
+        if checkpoint:
+            checkpoint.complete(issue)
 
 
 def main(args=None):
@@ -517,20 +1033,310 @@ def main(args=None):
         type=str,
         help='specify a jira token file other than the default ~/.jira.token')
 
+    parser.add_argument(
+        '--lp-page-size',
+        dest='lp_page_size',
+        type=lp_page_size,
+        default=LP_MAX_PAGE_SIZE,
+        help='number of LP bug tasks fetched per request (1 to {})'.format(
+            LP_MAX_PAGE_SIZE))
+
+    parser.add_argument(
+        '--lp-workers',
+        dest='lp_workers',
+        type=lp_workers,
+        default=4,
+        help='number of LP pages fetched concurrently')
+
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument(
+        '--record',
+        dest='record',
+        type=str,
+        metavar='DIR',
+        help='record every LP and Jira HTTP exchange of this run in DIR')
+
+    cassette_group.add_argument(
+        '--replay',
+        dest='replay',
+        type=str,
+        metavar='DIR',
+        help='run offline against the HTTP exchanges recorded in DIR')
+
+    parser.add_argument(
+        '--replay-latency',
+        dest='replay_latency',
+        type=replay_latency,
+        default=0.0,
+        help='seconds added to each replayed exchange, or "recorded" to '
+             'replay the original latency')
+
+    parser.add_argument(
+        '--backfill-labels',
+        dest='backfill_labels',
+        action='store_true',
+        help='label the issues synced by older versions with their bugset '
+             'and exit, to be run once')
+
+    parser.add_argument(
+        '--bug',
+        dest='bug',
+        type=int,
+        help='only sync this LP bug')
+
+    parser.add_argument(
+        '--package',
+        dest='packages',
+        action='append',
+        metavar='PACKAGE',
+        help='only sync the bugs of this package, can be repeated')
+
+    parser.add_argument(
+        '--component',
+        dest='components',
+        action='append',
+        metavar='COMPONENT',
+        help='only sync the bugs of the packages of this Jira component '
+             '(see --components-mapping), can be repeated')
+
+    parser.add_argument(
+        '--resume',
+        dest='resume',
+        action='store_true',
+        help='continue an interrupted run from its checkpoint journal')
+
+    parser.add_argument(
+        '--checkpoint',
+        dest='checkpoint',
+        type=str,
+        metavar='PATH',
+        help='checkpoint journal of the run, defaults to '
+             '~/.cache/lp-to-jira-sync/PROJECT-TAG.journal')
+
+    parser.add_argument(
+        '--estimate',
+        dest='estimate',
+        action='store_true',
+        help='dry run reporting the LP and Jira requests a real run would '
+             'make and how long it would take')
+
+    parser.add_argument(
+        '--max-writes',
+        dest='max_writes',
+        type=int,
+        metavar='N',
+        help='stop once N write requests were sent to Jira, the most '
+             'important bugsets are synced first')
+
+    parser.add_argument(
+        '--time-budget',
+        dest='time_budget',
+        type=float,
+        metavar='SECONDS',
+        help='stop taking on bugsets after SECONDS, the most important '
+             'bugsets are synced first')
+
+    parser.add_argument(
+        '--no-bulk-edits',
+        dest='no_bulk_edits',
+        action='store_true',
+        help='update the priority and components of each issue on its own '
+             'instead of grouping identical changes in bulk edits')
+
+    parser.add_argument(
+        '--incremental',
+        dest='incremental',
+        action='store_true',
+        help='only fetch the Jira issues updated since the previous '
+             'incremental run, the others come from its snapshot')
+
+    parser.add_argument(
+        '--jira-snapshot',
+        dest='jira_snapshot',
+        type=str,
+        metavar='PATH',
+        help='snapshot of the Jira issues for --incremental, defaults to '
+             '~/.cache/lp-to-jira-sync/PROJECT-TAG.jira.json')
+
+    parser.add_argument(
+        '--profile',
+        dest='profile',
+        type=str,
+        metavar='DIR',
+        help='write a cProfile dump per phase and a report of the slowest '
+             'bugsets in DIR')
+
+    parser.add_argument(
+        '--profile-top',
+        dest='profile_top',
+        type=int,
+        default=10,
+        help='number of bugsets listed in the profile report')
+
     opts = parser.parse_args(args)
 
-    config = SyncConfig(
-        project=opts.project,
-        lp_tag=opts.tag,
-        lp_team=opts.team,
-        # TODO : Special packages should be a configuration option
-        special_packages=['subiquity', 'netplan', 'apport', 'ubuntu-cdimage'],
-        dry_run=opts.dry_run,
-        team_ids_json=opts.team_ids,
-        packages_mapping_json=opts.components_mapping,
-        jira_token=opts.jira_token
-        )
+    # Hooks installed first see the requests first, the profiler must come
+    # before a replaying cassette which doesn't pass requests on
+    profiler = None
+    if opts.profile:
+        profiler = Profiler(opts.profile, top=opts.profile_top).start()
+
+    cassette = None
+    if opts.record:
+        cassette = Cassette(opts.record, mode='record').start()
+    elif opts.replay:
+        cassette = Cassette(opts.replay, mode='replay',
+                            latency=opts.replay_latency).start()
+
+    budget = None
+    if opts.max_writes is not None or opts.time_budget is not None:
+        budget = RunBudget(opts.max_writes, opts.time_budget).start()
+
+    # Installed last, to be the first hook and refuse any write
+    estimate = None
+    if opts.estimate:
+        estimate = CostEstimate().start()
+        if cassette and cassette.replaying:
+            estimate.load_latencies(cassette)
+
+    try:
+        run(opts, cassette, profiler, budget, estimate)
+    finally:
+        if estimate:
+            estimate.stop()
+        if budget:
+            budget.stop()
+        if cassette:
+            cassette.stop()
+        if profiler:
+            profiler.stop()
+
+
+def replay_latency(value):
+    if value == 'recorded':
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "expected a number of seconds or 'recorded'")
+
+
+def lp_page_size(value):
+    try:
+        size = int(value)
+    except ValueError:
+        size = 0
+    if not 1 <= size <= LP_MAX_PAGE_SIZE:
+        raise argparse.ArgumentTypeError(
+            "expected a number of tasks from 1 to {}".format(LP_MAX_PAGE_SIZE))
+    return size
+
+
+def lp_workers(value):
+    try:
+        workers = int(value)
+    except ValueError:
+        workers = 0
+    if workers < 1:
+        raise argparse.ArgumentTypeError("expected at least 1 worker")
+    return workers
+
+
+def run(opts, cassette=None, profiler=None, budget=None, estimate=None):
+    with profile_phase(profiler, 'init'), estimate_phase(estimate, 'init'):
+        config = SyncConfig(
+            project=opts.project,
+            lp_tag=opts.tag,
+            lp_team=opts.team,
+            # TODO : Special packages should be a configuration option
+            special_packages=['subiquity', 'netplan', 'apport',
+                              'ubuntu-cdimage'],
+            dry_run=opts.dry_run or opts.estimate,
+            team_ids_json=opts.team_ids,
+            packages_mapping_json=opts.components_mapping,
+            jira_token=opts.jira_token,
+            lp_page_size=opts.lp_page_size,
+            lp_workers=opts.lp_workers,
+            cassette=cassette,
+            profiler=profiler,
+            scope_bug=opts.bug,
+            scope_packages=opts.packages or [],
+            scope_components=opts.components or []
+            )
+
+    if opts.backfill_labels:
+        backfill_labels(config)
+        return
 
+    # Scoped runs are short, they don't need to be resumed nor to maintain
+    # the Jira snapshot of the whole project
+    scoped = config.scope_bug or config.scope_packages
+
+    checkpoint = None
+    if not config.dry_run and not scoped:
+        checkpoint = Checkpoint(
+            opts.checkpoint or checkpoint_path(config.project, config.tag),
+            config.project, config.tag)
+
+    if estimate:
+        # Take the paths of a real run, the client only records the writes
+        config.jira = DryRunJira(config.jira, estimate)
+        config.dry_run = False
+        config.estimate = estimate
+        estimate.budget = budget
+
+    jira_snapshot = None
+    if opts.incremental and not scoped:
+        jira_snapshot = JiraSnapshot(
+            opts.jira_snapshot
+            or jira_snapshot_path(config.project, config.tag),
+            config.project, config.tag)
+    config.jira_snapshot = jira_snapshot
+
+    if opts.resume and checkpoint and checkpoint.load():
+        print("Resuming from {}, {} bugset{} already completed".format(
+            checkpoint.path, len(checkpoint.done),
+            "s" if len(checkpoint.done) > 1 else ""))
+        refined_tasks = checkpoint.tasks
+        all_issues = checkpoint.issues
+        config.sponsored_bugs = checkpoint.sponsored_bugs
+    else:
+        if opts.resume:
+            print("Nothing to resume, starting a new run")
+        refined_tasks, all_issues = read_phase(config, profiler)
+        if checkpoint:
+            checkpoint.start(refined_tasks, all_issues, config.sponsored_bugs)
+
+    if not config.dry_run and not opts.no_bulk_edits:
+        config.bulk_edits = BulkEdits(config.jira, config.jira_component_ids)
+
+    config.budget = budget
+    config.checkpoint = checkpoint
+    try:
+        with profile_phase(profiler, 'process'), \
+                estimate_phase(estimate, 'process'):
+            process_issues(refined_tasks, all_issues, config)
+    finally:
+        if checkpoint:
+            checkpoint.close()
+
+    if checkpoint:
+        checkpoint.finish()
+
+    # Only a run that went through leaves a snapshot for the next one, an
+    # estimate didn't change anything
+    if jira_snapshot and jira_snapshot.issues is not None and not estimate:
+        jira_snapshot.save()
+
+    print(config.http.report())
+
+    if estimate:
+        print(estimate.report(), end='')
+
+
+def read_phase(config, profiler=None):
+    """Fetch the LP bugsets and the Jira issues to reconcile"""
     print("Found {} subscribed packages by team {}"
           .format(len(config.restricted_pkgs), config.team))
 
@@ -543,27 +1349,39 @@ def main(args=None):
                 'Confirmed',
                 'Fix Released']
 
-    # TODO searchTasks could return lazr.restfulclient.errors.ServerError:
-    # HTTP Error 503: Service Unavailable, Should probably catch this exception
-    tasks = config.lp.bugs.searchTasks(tags=config.tag, status=statuses)
-    print(" - Found {} bug's task{} in LaunchPad".format(
-        len(tasks), "s" if len(tasks) > 1 else "")
-    )
+    with profile_phase(profiler, 'lp-fetch'), \
+            estimate_phase(config.estimate, 'lp-fetch'):
+        # TODO searchTasks could return HTTP Error 503: Service Unavailable,
+        # Should probably catch this exception
+        tasks = search_lp_tasks(config, statuses)
+        print(" - Found {} bug's task{} in LaunchPad".format(
+            len(tasks), "s" if len(tasks) > 1 else "")
+        )
 
-    # Remove tasks that affects non ubscribed ackages
-    refined_tasks = refine_tasks(tasks, config)
+        # Remove tasks that affects non ubscribed ackages
+        refined_tasks = refine_tasks(tasks, config)
+        # Only snapshots are kept from here
+        del tasks
+
+        config.sponsored_bugs = find_sponsored_bugs(config, statuses)
 
     print(" - Found {} valid bug's task{}".format(
         len(refined_tasks), "s" if len(refined_tasks) > 1 else "")
     )
+    print(" - Found {} bug{} subscribed by {}".format(
+        len(config.sponsored_bugs),
+        "s" if len(config.sponsored_bugs) > 1 else "", sponsors_team)
+    )
 
     # Create a set of all active Jira issues
     print("Retrieving all the imported LP Tasks in Jira")
-    all_issues = find_bugs_in_jira_project(config.jira, config.project)
+    with profile_phase(profiler, 'jira-fetch'), \
+            estimate_phase(config.estimate, 'jira-fetch'):
+        all_issues = fetch_jira_issues(config, scope_jql(config))
     print(" - Found {} issue{} in JIRA".format(
         len(all_issues), "s" if len(all_issues) > 1 else "")
     )
 
-    process_issues(refined_tasks, all_issues, config)
+    return refined_tasks, all_issues
 
 # =============================================================================
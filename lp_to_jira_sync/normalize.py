@@ -0,0 +1,33 @@
+"""Canonical forms of the fields compared between LP and Jira
+
+Two renderings of the same value, a checklist listing the series in another
+order, a title with different spacing, a component name in another case,
+must compare equal or every run rewrites them and comments about it.
+"""
+
+
+def canonical_title(title):
+    """Collapse runs of whitespace"""
+    return " ".join((title or "").split())
+
+
+def canonical_checklist(checklist):
+    """Return the checklist with its items sorted and whitespace collapsed,
+    headings first"""
+    lines = [canonical_title(line) for line in (checklist or "").splitlines()]
+    headings = [line for line in lines if line.startswith("#")]
+    items = sorted(line for line in lines if line and line[0] != "#")
+    return "\n".join(headings + items)
+
+
+def canonical_name(name):
+    return canonical_title(name).casefold()
+
+
+def find_name(name, names):
+    """Return the entry of names matching name, None if there is none"""
+    wanted = canonical_name(name)
+    for candidate in names:
+        if canonical_name(candidate) == wanted:
+            return candidate
+    return None
@@ -0,0 +1,95 @@
+"""Per phase profiles and per bugset timings of a sync run
+
+Each phase of a run gets its own cProfile dump (pstats format, readable by
+snakeviz, gprof2dot or flameprof) so the sync logic isn't drowned in the
+client libraries of the other phases. Bugsets are timed individually along
+with the HTTP requests they made, to point at the slowest ones.
+"""
+import cProfile
+import contextlib
+import os
+import threading
+import time
+
+from lp_to_jira_sync import http_hooks
+
+
+class Profiler:
+    def __init__(self, path, top=10):
+        self.path = path
+        self.top = top
+        self.phases = []
+        self.bugsets = []
+        self._local = threading.local()
+
+    def start(self):
+        os.makedirs(self.path, exist_ok=True)
+        http_hooks.install(self)
+        return self
+
+    def stop(self):
+        http_hooks.uninstall(self)
+        report = self.report()
+        with open(os.path.join(self.path, 'report.txt'), 'w') as f:
+            f.write(report)
+        print(report, end='')
+
+    def __call__(self, request, send):
+        requests = getattr(self._local, 'requests', None)
+        if requests is not None:
+            requests.append("{} {}".format(request.method, request.url))
+        return send()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - started
+            self.phases.append((name, elapsed))
+            profile.dump_stats(os.path.join(
+                self.path, "{:02d}-{}.prof".format(len(self.phases), name)))
+
+    @contextlib.contextmanager
+    def bugset(self, bugset):
+        self._local.requests = []
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.bugsets.append((elapsed, bugset, self._local.requests))
+            self._local.requests = None
+
+    def report(self):
+        lines = ["Phases:"]
+        for name, elapsed in self.phases:
+            lines.append("  {:<12} {:8.3f}s".format(name, elapsed))
+
+        slowest = sorted(self.bugsets, key=lambda b: b[0], reverse=True)
+        lines.append("Slowest {} of {} bugsets:".format(
+            min(self.top, len(slowest)), len(slowest)))
+        for elapsed, bugset, requests in slowest[:self.top]:
+            lines.append("  LP: #{} [{}] {:.3f}s, {} request{}".format(
+                bugset[0], bugset[1], elapsed, len(requests),
+                "s" if len(requests) > 1 else ""))
+            for request in requests:
+                lines.append("    " + request)
+
+        return "\n".join(lines) + "\n"
+
+
+def profile_phase(profiler, name):
+    if not profiler:
+        return contextlib.nullcontext()
+    return profiler.phase(name)
+
+
+def profile_bugset(profiler, bugset):
+    if not profiler:
+        return contextlib.nullcontext()
+    return profiler.bugset(bugset)
@@ -1,14 +1,27 @@
-from jira import JIRA
-import requests
 import json
 
-from launchpadlib.launchpad import Launchpad
-
 from lp_to_jira_sync.jira_config import jira_config
+from lp_to_jira_sync.http_session import SessionFactory
+
+# jira and launchpadlib take most of the start up time, they are only
+# imported once a SyncConfig is built so that --help, bad arguments and
+# configuration errors don't have to wait for them
+JIRA = None
+Launchpad = None
+
+
+def load_clients():
+    global JIRA, Launchpad
+    if JIRA is None:
+        from jira import JIRA
+    if Launchpad is None:
+        from launchpadlib.launchpad import Launchpad
 
 teampkgs =\
     'http://reqorts.qa.ubuntu.com/reports/m-r-package-team-mapping.json'
 
+lp_api_root = 'https://api.launchpad.net/devel/'
+
 
 class SyncConfig:
     def __init__(self,
@@ -22,20 +35,76 @@ class SyncConfig:
                  special_packages=[],
                  packages_mapping_json="",
                  dry_run=True,
+                 lp_page_size=300,
+                 lp_workers=4,
+                 cassette=None,
+                 profiler=None,
+                 scope_bug=None,
+                 scope_packages=[],
+                 scope_components=[],
                  args=None):
 
+        # Read local configuration files first, mistakes there should fail
+        # before reaching any server
+        self.team_ids = []
+        if team_ids_json:
+            with open(team_ids_json) as file:
+                self.team_ids = json.load(file)
+
+        self.components_ids = []
+        if packages_mapping_json:
+            with open(packages_mapping_json) as file:
+                self.components_ids = json.load(file)
+
+        # package -> component, a package listed in several components keeps
+        # the first one
+        self.package_components = {}
+        for comp in self.components_ids:
+            for package in self.components_ids[comp]:
+                self.package_components.setdefault(package, comp)
+
+        # A run can be restricted to a bug and/or a set of packages, given
+        # directly or through their Jira component
+        self.scope_bug = scope_bug
+        self.scope_packages = list(scope_packages)
+        for component in scope_components:
+            if component not in self.components_ids:
+                raise ValueError(
+                    "ERROR: Component {} is not in the components mapping"
+                    .format(component))
+            # An empty scope would turn into a sync of the whole project
+            if not self.components_ids[component]:
+                raise ValueError(
+                    "ERROR: Component {} has no packages in the components "
+                    "mapping".format(component))
+            self.scope_packages += self.components_ids[component]
+
+        load_clients()
+
+        # Every requests based client shares the same pooled sessions, sized
+        # for the concurrent LP workers
+        self.http = SessionFactory(pool_size=max(lp_workers, 10))
+
         if not jira:
             try:
                 print("initializing Jira API ....")
-                jira_cfg = None
-                if jira_token:
-                    jira_cfg = jira_config(credstore=jira_token)
+                if cassette and cassette.replaying:
+                    # Replayed exchanges don't need real credentials
+                    server = cassette.meta['jira-server']
+                    auth = ('replay', 'replay')
                 else:
-                    jira_cfg = jira_config()
-
-                self.jira = JIRA(
-                    jira_cfg.server,
-                    basic_auth=(jira_cfg.login, jira_cfg.token))
+                    if jira_token:
+                        jira_cfg = jira_config(credstore=jira_token)
+                    else:
+                        jira_cfg = jira_config()
+                    server = jira_cfg.server
+                    auth = (jira_cfg.login, jira_cfg.token)
+                    if cassette:
+                        cassette.meta['jira-server'] = server
+
+                self.jira = JIRA(server, basic_auth=auth,
+                                 timeout=self.http.timeout)
+                self.http.adopt(self.jira._session)
             except ValueError as e:
                 raise ValueError("ERROR: Cannot initialize Jira API") from e
         else:
@@ -43,9 +112,9 @@ class SyncConfig:
 
         self.project = project
 
-        self.jira_components = [
-            x.name for x in self.jira.project_components(project)
-            ]
+        components = self.jira.project_components(project)
+        self.jira_components = [x.name for x in components]
+        self.jira_component_ids = {x.name: x.id for x in components}
 
         if not lp_api:
             print("initializing LaunchPad API ....")
@@ -56,6 +125,12 @@ class SyncConfig:
         else:
             self.lp = lp_api
 
+        # Bulk reads bypass launchpadlib and go straight to the web service
+        self.lp_api_root = lp_api_root
+        self.lp_page_size = lp_page_size
+        self.lp_workers = lp_workers
+        self.http_session = self.http.session()
+
         self.tag = lp_tag
 
         self.team = lp_team
@@ -66,7 +141,7 @@ class SyncConfig:
         if lp_team:
             print("Building list of restricted packages ....")
             # First we wil try to download the team mapping which is faster
-            response = requests.get(teampkgs)
+            response = self.http_session.get(teampkgs)
             if response.status_code == 200:
                 json_data = response.json()
                 self.restricted_pkgs = json_data[lp_team]
@@ -75,26 +150,37 @@ class SyncConfig:
                 pkgs = self.lp.people[self.team].getBugSubscriberPackages()
                 self.restricted_pkgs = [pkg.name for pkg in pkgs]
 
-        self.team_ids = []
-        if team_ids_json:
-            with open(team_ids_json) as file:
-                self.team_ids = json.load(file)
+        self.special_packages = special_packages
 
-        self.components_ids = []
-        if packages_mapping_json:
-            with open(packages_mapping_json) as file:
-                self.components_ids = json.load(file)
+        # ids of the bugs ubuntu-sponsors is subscribed to
+        self.sponsored_bugs = set()
 
-        self.special_packages = special_packages
+        # Whether issues synced before the bugset labels are left, checked
+        # the first time a bug isn't in the Jira issue index
+        self.unlabelled_issues = None
 
         self.dry_run = dry_run
 
+        self.profiler = profiler
+
+        # Journal of the completed bugsets, see checkpoint.Checkpoint
+        self.checkpoint = None
+
+        # Jira issue index of the previous run, see jira_snapshot.JiraSnapshot
+        self.jira_snapshot = None
+
+        # Priority and component changes queued by sync(), see
+        # bulk_edit.BulkEdits
+        self.bulk_edits = None
+
+        # Write and time limits of the run, see budget.RunBudget
+        self.budget = None
+
+        # Requests of a real run counted by a dry run, see
+        # cost_estimate.CostEstimate
+        self.estimate = None
+
         self.args = args
 
     def package_to_component(self, package):
-        if self.components_ids:
-            for comp in self.components_ids:
-                if package in self.components_ids[comp]:
-                    return comp
-
-        return ""
+        return self.package_components.get(package, "")
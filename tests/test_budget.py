@@ -0,0 +1,35 @@
+from lp_to_jira_sync import http_hooks
+from lp_to_jira_sync.budget import RunBudget
+from lp_to_jira_sync.http_hooks import HTTPRequest
+
+
+def request(method):
+    return HTTPRequest('requests', method, 'https://jira/issue/FR-1', None)
+
+
+def test_max_writes():
+    budget = RunBudget(max_writes=2).start()
+    assert http_hooks._hooks[0] is budget
+
+    budget(request('GET'), lambda: None)
+    budget(request('PUT'), lambda: None)
+    assert not budget.exhausted()
+    budget(request('POST'), lambda: None)
+    assert budget.exhausted() == "2 writes"
+
+    budget.stop()
+    assert not http_hooks._hooks
+
+
+def test_pending_writes_count():
+    budget = RunBudget(max_writes=3)
+    budget.writes = 1
+
+    assert not budget.exhausted(pending=1)
+    assert budget.exhausted(pending=2) == "3 writes"
+
+
+def test_time_budget():
+    assert RunBudget(time_budget=0).exhausted()
+    assert not RunBudget(time_budget=60).exhausted()
+    assert not RunBudget().exhausted()
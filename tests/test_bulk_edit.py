@@ -0,0 +1,99 @@
+import json
+from unittest.mock import MagicMock
+from jira.exceptions import JIRAError
+from lp_to_jira_sync.bulk_edit import BulkEdits
+
+
+def issue(number):
+    return MagicMock(key="FR-{}".format(number), id=str(10000 + number))
+
+
+def edits(jira):
+    """The issues updated one by one, with the fields sent"""
+    return [(call[0][0], json.loads(call[1]['data']))
+            for call in jira._session.put.call_args_list]
+
+
+def jira_client():
+    jira = MagicMock()
+    high, medium = MagicMock(id="2"), MagicMock(id="3")
+    high.name, medium.name = "High", "Medium"
+    jira.priorities.return_value = [high, medium]
+    jira._get_url.side_effect = lambda path: "https://jira/" + path
+    jira._session.post.return_value.json.return_value = {'taskId': "42"}
+    return jira
+
+
+def test_identical_changes_are_grouped():
+    jira = jira_client()
+    # FR-3 failed in the bulk edit
+    jira._get_json.side_effect = [
+        {'status': 'RUNNING'},
+        {'status': 'COMPLETE', 'processedAccessibleIssues': [10001, 10002]}]
+    bulk = BulkEdits(jira, {"boot": "7"}, poll=0)
+    issues = [issue(1), issue(2), issue(3), issue(4)]
+    for i in issues[:3]:
+        bulk.add(i, 'priority', "High")
+    bulk.add(issues[3], 'components', "boot")
+
+    recorded = []
+    bulk.defer("FR-1", lambda: recorded.append("FR-1"))
+    bulk.defer("FR-9", lambda: recorded.append("FR-9"))
+    assert recorded == ["FR-9"]
+
+    bulk.flush()
+
+    url, = jira._session.post.call_args[0]
+    assert url == "https://jira/bulk/issues/fields"
+    assert json.loads(jira._session.post.call_args[1]['data']) == {
+        'selectedIssueIdsOrKeys': ["FR-1", "FR-2", "FR-3"],
+        'selectedActions': ['priority'],
+        'editedFieldsInput': {'priority': {'priorityId': "2"}},
+        'sendBulkNotification': False}
+    jira._get_json.assert_called_with('bulk/queue/42')
+
+    assert edits(jira) == [
+        ("https://jira/issue/FR-3", {'fields': {'priority': {'name': "High"}}}),
+        # A single issue isn't worth a bulk edit
+        ("https://jira/issue/FR-4",
+         {'fields': {'components': [{'name': "boot"}]}})]
+    # Edited by key, the issues aren't loaded
+    jira.issue.assert_not_called()
+    assert jira._session.post.call_count == 1
+    assert recorded == ["FR-9", "FR-1"]
+    assert not bulk.is_pending("FR-1")
+
+
+def test_fallback_without_bulk_edit_api():
+    jira = jira_client()
+    jira._session.post.side_effect = JIRAError(status_code=404)
+    bulk = BulkEdits(jira)
+    issues = [issue(1), issue(2)]
+    for i in issues:
+        bulk.add(i, 'priority', "Medium")
+
+    bulk.flush()
+
+    assert edits(jira) == [
+        ("https://jira/issue/FR-{}".format(number),
+         {'fields': {'priority': {'name': "Medium"}}}) for number in (1, 2)]
+    assert not bulk.supported
+
+    for i in issues:
+        bulk.add(i, 'priority', "High")
+    bulk.flush()
+    assert jira._session.post.call_count == 1
+
+
+def test_pending_writes():
+    bulk = BulkEdits(jira_client())
+    for number in range(1, 4):
+        bulk.add(issue(number), 'priority', "High")
+    bulk.add(issue(4), 'components', "boot")
+    bulk.defer("FR-1", lambda: None)
+    bulk.defer("FR-1", lambda: None, writes=0)
+
+    # One bulk edit, one update and the deferred write
+    assert bulk.pending_writes() == 3
+    bulk.supported = False
+    assert bulk.pending_writes() == 5
@@ -0,0 +1,61 @@
+import pytest
+import requests
+import httplib2
+from unittest.mock import patch
+from lp_to_jira_sync import http_hooks
+from lp_to_jira_sync.cassette import Cassette, CassetteMiss
+from lp_to_jira_sync.http_hooks import HTTPRequest
+
+
+def fake_send(adapter, request, **kwargs):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json'
+    response.headers['Content-Encoding'] = 'gzip'
+    response._content = ('{"url": "%s"}' % request.url).encode()
+    return response
+
+
+@patch('requests.adapters.HTTPAdapter.send', fake_send)
+def test_record_and_replay_requests(tmp_path):
+    with Cassette(str(tmp_path), mode='record') as cassette:
+        cassette.meta['jira-server'] = 'https://jira'
+        recorded = requests.get('https://jira/rest/api/2/serverInfo').json()
+
+    assert not http_hooks._hooks
+
+    with Cassette(str(tmp_path), mode='replay') as cassette:
+        assert cassette.meta['jira-server'] == 'https://jira'
+        response = requests.get('https://jira/rest/api/2/serverInfo')
+        assert response.json() == recorded
+        assert 'Content-Encoding' not in response.headers
+
+        with pytest.raises(CassetteMiss):
+            requests.get('https://jira/rest/api/2/myself')
+
+
+def test_replay_httplib2_in_order(tmp_path):
+    calls = iter([b'first', b'second'])
+
+    def send():
+        return httplib2.Response({'status': '200'}), next(calls)
+
+    request = HTTPRequest('httplib2', 'GET', 'https://lp/devel/bugs', None)
+    cassette = Cassette(str(tmp_path), mode='record').start()
+    cassette(request, send)
+    cassette(request, send)
+    cassette.stop()
+
+    cassette = Cassette(str(tmp_path), mode='replay').start()
+    served = [cassette(request, None) for _ in range(3)]
+    cassette.stop()
+
+    assert [content for _, content in served] == [
+        b'first', b'second', b'second']
+    assert served[0][0].status == 200
+
+
+def test_replay_missing_cassette(tmp_path):
+    with pytest.raises(ValueError):
+        Cassette(str(tmp_path / 'nothing'), mode='replay').start()
+    assert not http_hooks._hooks
@@ -0,0 +1,80 @@
+import pytest
+from unittest.mock import MagicMock
+from lp_to_jira_sync.checkpoint import Checkpoint
+from lp_to_jira_sync.lp_task import LPTask
+from lp_to_jira_sync.jira_issue import JiraIssue
+from lp_to_jira_sync.lp_to_jira_sync import process_issues
+
+
+issue = JiraIssue("FR-1", "LP#1 [glibc] a", "Triaged", None)
+task = LPTask(1, "glibc (Ubuntu)", 'Bug #1 in glibc (Ubuntu): "a"', "New",
+              "High", None, False, "https://bugs.launchpad.net/bugs/1")
+
+
+def started(path):
+    checkpoint = Checkpoint(str(path), "FR", "foo")
+    checkpoint.start({(1, "glibc"): [task], (2, "shim"): [task]},
+                     {(1, "glibc"): issue},
+                     {2})
+    return checkpoint
+
+
+def test_resume_journal(tmp_path):
+    checkpoint = started(tmp_path / "run.journal")
+    checkpoint.complete((1, "glibc"))
+    checkpoint.close()
+
+    resumed = Checkpoint(str(tmp_path / "run.journal"), "FR", "foo")
+    assert resumed.load()
+    assert resumed.tasks == {(1, "glibc"): [task], (2, "shim"): [task]}
+    assert resumed.issues == {(1, "glibc"): issue}
+    assert resumed.sponsored_bugs == {2}
+    assert resumed.is_done((1, "glibc"))
+    assert not resumed.is_done((2, "shim"))
+
+    resumed.finish()
+    assert not (tmp_path / "run.journal").exists()
+
+
+def test_resume_after_torn_line(tmp_path):
+    checkpoint = started(tmp_path / "run.journal")
+    checkpoint.complete((1, "glibc"))
+    checkpoint._file.write('{"done": [2, "sh')
+    checkpoint.close()
+
+    resumed = Checkpoint(str(tmp_path / "run.journal"), "FR", "foo")
+    assert resumed.load()
+    resumed.complete((2, "shim"))
+    resumed.close()
+
+    again = Checkpoint(str(tmp_path / "run.journal"), "FR", "foo")
+    assert again.load()
+    assert again.done == {(1, "glibc"), (2, "shim")}
+
+
+def test_nothing_to_resume(tmp_path):
+    assert not Checkpoint(str(tmp_path / "none"), "FR", "foo").load()
+
+    started(tmp_path / "run.journal").close()
+    assert not Checkpoint(str(tmp_path / "run.journal"), "FR", "bar").load()
+
+    (tmp_path / "read.journal").write_text(
+        '{"project": "FR", "tag": "foo"}\n')
+    assert not Checkpoint(str(tmp_path / "read.journal"), "FR", "foo").load()
+
+
+def test_process_issues_skips_completed_bugsets():
+    done = MagicMock()
+    done.key = "FR-1"
+    closed = MagicMock()
+    closed.key = "FR-3"
+    config = MagicMock(dry_run=False, budget=None)
+    config.checkpoint.is_done.side_effect = lambda bugset: bugset in (
+        (1, "glibc"), (3, "vim"))
+
+    process_issues({(1, "glibc"): [task]},
+                   {(1, "glibc"): done, (3, "vim"): closed}, config)
+
+    config.jira.issue.assert_not_called()
+    config.jira.transition_issue.assert_not_called()
+    config.checkpoint.complete.assert_not_called()
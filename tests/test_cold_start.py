@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+
+
+# Seconds allowed to import the CLI module in a fresh interpreter, the client
+# libraries alone take about twice as much
+COLD_START_BUDGET = 0.15
+
+heavy_modules = ('jira', 'launchpadlib', 'requests', 'httplib2')
+
+cold_start = """
+import sys, time
+started = time.perf_counter()
+import lp_to_jira_sync.lp_to_jira_sync as cli
+elapsed = time.perf_counter() - started
+{}
+print(elapsed)
+print(",".join(m for m in {} if m in sys.modules))
+"""
+
+
+def run_cold(code=""):
+    result = subprocess.run(
+        [sys.executable, "-c", cold_start.format(code, heavy_modules)],
+        capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    lines = result.stdout.splitlines()
+    return float(lines[-2]), lines[-1], result
+
+
+def test_import_is_light():
+    elapsed, loaded, result = min(run_cold() for _ in range(3))
+
+    assert loaded == ""
+    assert elapsed < COLD_START_BUDGET
+
+
+def test_help_and_bad_arguments_skip_client_libraries():
+    code = """
+for args in (['--help'], ['-p', 'FR']):
+    try:
+        cli.main(args)
+    except SystemExit:
+        pass
+"""
+    _, loaded, result = run_cold(code)
+
+    assert "usage:" in result.stdout
+    assert "the following arguments are required" in result.stderr
+    assert loaded == ""
+
+
+def test_bad_configuration_skips_client_libraries():
+    code = """
+try:
+    cli.main(['-p', 'FR', '-t', 'tag', '-i', '/nonexistent.json'])
+except FileNotFoundError:
+    pass
+"""
+    _, loaded, result = run_cold(code)
+
+    assert loaded == ""
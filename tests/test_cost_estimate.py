@@ -0,0 +1,96 @@
+import pytest
+from unittest.mock import MagicMock
+from lp_to_jira_sync.bulk_edit import BulkEdits
+from lp_to_jira_sync.cost_estimate import CostEstimate, DryRunJira, \
+    DryRunWrite, endpoint
+from lp_to_jira_sync.http_hooks import HTTPRequest
+from lp_to_jira_sync.jira_issue import JiraIssue
+from lp_to_jira_sync.lp_task import LPTask
+from lp_to_jira_sync.lp_to_jira_sync import bugset_labels, process_issues
+
+
+task = LPTask(1, "glibc (Ubuntu)", 'Bug #1 in glibc (Ubuntu): "It is broken"',
+              "New", "High", None, False, "https://bugs.launchpad.net/bugs/1")
+
+
+def test_endpoint():
+    assert endpoint("https://jira.example.com/rest/api/2/issue/FR-12/comment"
+                    ) == ('jira', 'issue/{key}/comment')
+    assert endpoint("https://api.launchpad.net/devel/bugs/1234/bug_tasks"
+                    ) == ('lp', 'bugs/{id}/bug_tasks')
+    assert endpoint("https://api.launchpad.net/devel/ubuntu/+source/glibc"
+                    "?ws.op=searchTasks&ws.size=300") == (
+        'lp', 'ubuntu/+source/{package}?ws.op=searchTasks')
+
+
+def test_reads_are_counted_and_writes_refused():
+    estimate = CostEstimate()
+    with estimate.phase('jira-fetch'):
+        estimate(HTTPRequest('requests', 'GET',
+                             'https://jira/rest/api/2/search', None),
+                 lambda: None)
+        with pytest.raises(DryRunWrite):
+            estimate(HTTPRequest('requests', 'PUT',
+                                 'https://jira/rest/api/2/issue/FR-1', None),
+                     lambda: None)
+
+    assert estimate.requests == {
+        ('jira-fetch', 'jira', 'GET', 'search', 'read'): 1}
+
+
+def test_dry_run_counts_the_writes_of_a_real_run():
+    estimate = CostEstimate()
+    jira = MagicMock()
+    full_issue = jira.issue.return_value
+    full_issue.key = "FR-1"
+    full_issue.raw = {}
+    full_issue.fields.summary = "LP#1 [glibc] It is broken"
+    full_issue.fields.labels = bugset_labels((1, "glibc"))
+    full_issue.fields.status.name = "Triaged"
+    full_issue.fields.priority.name = "Low"
+    config = MagicMock(team_ids=[], jira_components=[], dry_run=False,
+                       checkpoint=None, jira_snapshot=None, bulk_edits=None,
+                       budget=None, sponsored_bugs=set())
+    config.jira = DryRunJira(jira, estimate)
+    estimate.latencies[('jira', 'PUT', 'issue/{key}')] = [0.5]
+
+    with estimate.phase('process'):
+        process_issues(
+            {(1, "glibc"): [task]},
+            {(1, "glibc"): JiraIssue("FR-1", "", "Triaged", "old"),
+             (2, "shim"): JiraIssue("FR-2", "", "Triaged", "old")},
+            config)
+
+    jira.issue.assert_called_once()
+    full_issue.update.assert_not_called()
+    jira.transition_issue.assert_not_called()
+    jira.add_comment.assert_not_called()
+    assert estimate.requests == {
+        ('process', 'jira', 'PUT', 'issue/{key}', 'update'): 1,
+        ('process', 'jira', 'GET', 'issue/{key}', 'read'): 1,
+        ('process', 'jira', 'PUT', 'issue/{key}/properties/{property}',
+         'update'): 1,
+        # FR-1 priority update and FR-2 moved to Done
+        ('process', 'jira', 'POST', 'issue/{key}/comment', 'comment'): 2,
+        ('process', 'jira', 'GET', 'issue/{key}/transitions', 'read'): 1,
+        ('process', 'jira', 'POST', 'issue/{key}/transitions',
+         'transition'): 1,
+    }
+
+    report = estimate.report()
+    assert ("Total: 0 LP reads, 2 Jira reads, 2 updates, 1 transitions, "
+            "2 comments, 0 creates") in report
+    # The writes take at least the latency of the priority update
+    duration = float(report.split("Estimated duration: ")[1].split("s")[0])
+    assert duration >= 0.5 * 2
+
+
+def test_dry_run_counts_single_edits_by_key():
+    estimate = CostEstimate()
+    bulk = BulkEdits(DryRunJira(MagicMock(), estimate))
+    bulk.add(MagicMock(key="FR-1", id="10001"), 'priority', "High")
+
+    bulk.flush()
+
+    assert estimate.requests == {
+        ('init', 'jira', 'PUT', 'issue/{key}', 'update'): 1}
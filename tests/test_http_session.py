@@ -0,0 +1,46 @@
+import pytest
+import requests
+from unittest.mock import patch, MagicMock
+from lp_to_jira_sync.http_session import SessionFactory
+
+
+def test_session_is_pooled():
+    factory = SessionFactory(pool_size=16, timeout=5)
+    session = factory.session()
+
+    adapter = session.get_adapter('https://api.launchpad.net/devel/bugs')
+    assert adapter._pool_maxsize == 16
+    assert adapter.max_retries.total == 3
+    assert 'gzip' in session.headers['Accept-Encoding']
+    assert session.headers['Connection'] == 'keep-alive'
+    assert factory.sessions == [session]
+
+
+def test_adopt_applies_default_timeout():
+    factory = SessionFactory(timeout=5)
+    session = factory.adopt(requests.Session())
+    seen = []
+
+    def send(adapter, request, **kwargs):
+        seen.append(kwargs['timeout'])
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+    with patch('requests.adapters.HTTPAdapter.send', send):
+        session.get('https://jira.example.com/rest/api/2/serverInfo')
+        session.get('https://jira.example.com/rest/api/2/myself', timeout=1)
+
+    assert seen == [5, 1]
+
+
+def test_reuse_report():
+    factory = SessionFactory()
+    session = factory.session()
+    pool = MagicMock(num_requests=10, num_connections=2)
+    adapter = session.get_adapter('https://api.launchpad.net')
+    adapter.poolmanager.pools['lp'] = pool
+
+    assert factory.stats() == (10, 2)
+    assert factory.report() == "HTTP: 10 requests over 2 connections " \
+        "(8 reused)"
@@ -0,0 +1,73 @@
+from unittest.mock import MagicMock
+from lp_to_jira_sync.jira_issue import JiraIssue
+from lp_to_jira_sync.jira_snapshot import JiraSnapshot
+from lp_to_jira_sync.lp_to_jira_sync import bugset_labels, fetch_jira_issues
+
+
+def raw_issue(key, bugset, fingerprint=None):
+    return {'key': key,
+            'fields': {'summary': "LP#{} [{}] a".format(*bugset),
+                       'status': {'name': "Triaged"},
+                       'labels': bugset_labels(bugset)},
+            'properties': {'lp-to-jira-sync': {'fingerprint': fingerprint}}}
+
+
+def issue(key, bugset, fingerprint=None):
+    return JiraIssue.from_raw(raw_issue(key, bugset, fingerprint))
+
+
+def test_save_and_load(tmp_path):
+    snapshot = JiraSnapshot(str(tmp_path / "FR.jira.json"), "FR", "foo")
+    snapshot.taken = 1000.0
+    snapshot.issues = {(1, "glibc"): issue("FR-1", (1, "glibc"), "abc")}
+    snapshot.save()
+
+    loaded = JiraSnapshot(str(tmp_path / "FR.jira.json"), "FR", "foo")
+    assert loaded.load()
+    assert loaded.issues == snapshot.issues
+    assert loaded.minutes_since(now=1000.0 + 61) == 2
+
+    assert not JiraSnapshot(
+        str(tmp_path / "FR.jira.json"), "FR", "bar").load()
+    assert not JiraSnapshot(str(tmp_path / "none.json"), "FR", "foo").load()
+
+
+def test_incremental_fetch(tmp_path):
+    snapshot = JiraSnapshot(str(tmp_path / "FR.jira.json"), "FR", "foo")
+    snapshot.taken = 1000.0
+    snapshot.issues = {
+        (1, "glibc"): issue("FR-1", (1, "glibc"), "abc"),
+        (2, "shim"): issue("FR-2", (2, "shim"), "abc"),
+        (3, "zlib"): issue("FR-3", (3, "zlib"), "abc"),
+    }
+    snapshot.save()
+
+    def search_issues(request, startAt=0, **kwargs):
+        if startAt:
+            return {'issues': []}
+        if 'updated >= "-' in request:
+            # FR-2 changed in Jira
+            return {'issues': [raw_issue("FR-2", (2, "shim"), "def")]}
+        if 'key in (FR-4)' in request:
+            return {'issues': [raw_issue("FR-4", (4, "lvm2"))]}
+        # FR-3 was moved to Done
+        return {'issues': [{'key': key} for key in ("FR-1", "FR-2", "FR-4")]}
+
+    config = MagicMock(project="FR",
+                       jira_snapshot=JiraSnapshot(snapshot.path, "FR", "foo"))
+    config.jira.search_issues.side_effect = search_issues
+
+    issues = fetch_jira_issues(config)
+
+    assert issues == {
+        (1, "glibc"): issue("FR-1", (1, "glibc"), "abc"),
+        (2, "shim"): issue("FR-2", (2, "shim"), "def"),
+        (4, "lvm2"): issue("FR-4", (4, "lvm2")),
+    }
+    assert config.jira_snapshot.issues == issues
+    assert config.jira_snapshot.taken > 1000.0
+    # Only the keys of the open issues are listed in full
+    assert sorted(call[1]['fields'] for call in
+                  config.jira.search_issues.call_args_list
+                  if not call[1]['startAt']) == [
+        'key', 'summary,status,labels', 'summary,status,labels']
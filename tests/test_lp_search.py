@@ -0,0 +1,76 @@
+import pytest
+from unittest.mock import MagicMock
+from urllib.parse import urlsplit, parse_qs
+from lp_to_jira_sync.lp_search import TaskSearch
+
+
+def lp_page(start, size, total, link_size=False):
+    entries = [{'title': 'Bug #{} in glibc (Ubuntu): "t"'.format(i),
+                'bug_target_name': 'glibc (Ubuntu)',
+                'status': 'New',
+                'importance': 'Low',
+                'assignee_link': None,
+                'is_complete': False,
+                'web_link': 'https://bugs.launchpad.net/bugs/{}'.format(i)}
+               for i in range(start, min(start + size, total))]
+    page = {'entries': entries, 'start': start}
+    if start + size < total:
+        page['next_collection_link'] = 'next'
+    if link_size:
+        page['total_size_link'] = 'size'
+    else:
+        page['total_size'] = total
+    return page
+
+
+def fake_session(total, link_size=False):
+    session = MagicMock()
+
+    def get(url):
+        response = MagicMock()
+        if url == 'size':
+            response.json.return_value = total
+            return response
+        query = parse_qs(urlsplit(url).query)
+        response.json.return_value = lp_page(
+            int(query['ws.start'][0]), int(query['ws.size'][0]), total,
+            link_size)
+        return response
+
+    session.get.side_effect = get
+    return session
+
+
+def test_search_all_pages_in_order():
+    session = fake_session(250)
+    search = TaskSearch('https://lp/', 'bugs',
+                        {'tags': 'foo', 'status': ['New', 'Triaged']},
+                        page_size=100, session=session)
+
+    assert len(search) == 250
+    ids = [task.bug_id for task in search]
+    assert ids == list(range(250))
+    assert session.get.call_count == 3
+
+    query = parse_qs(urlsplit(session.get.call_args_list[0][0][0]).query)
+    assert query['ws.op'] == ['searchTasks']
+    assert query['status'] == ['New', 'Triaged']
+    assert query['ws.size'] == ['100']
+
+
+def test_search_single_page():
+    session = fake_session(10)
+    search = TaskSearch('https://lp/', 'bugs', {}, session=session)
+
+    assert len(list(search)) == 10
+    session.get.assert_called_once()
+
+
+def test_search_size_link_and_page_size_cap():
+    session = fake_session(700, link_size=True)
+    search = TaskSearch('https://lp/', 'bugs', {}, page_size=1000,
+                        session=session)
+
+    assert search.page_size == 300
+    assert len(search) == 700
+    assert len(list(search)) == 700
@@ -0,0 +1,49 @@
+import pytest
+from unittest.mock import MagicMock
+from lp_to_jira_sync.lp_task import LPTask
+from lp_to_jira_sync.lp_to_jira_sync import refine_tasks
+
+
+def lp_entry(title, target, status="New"):
+    return MagicMock(title=title,
+                     bug_target_name=target,
+                     status=status,
+                     importance="High",
+                     assignee_link=None,
+                     is_complete=False,
+                     web_link="https://bugs.launchpad.net/ubuntu/+bug/1")
+
+
+def test_from_entry():
+    task = LPTask.from_entry(lp_entry(
+        'Bug #1234 in glibc (Ubuntu Jammy): "It is: broken"',
+        "glibc (Ubuntu Jammy)"))
+
+    assert task.bug_id == 1234
+    assert task.package == "glibc"
+    assert task.bug_title == "It is: broken"
+    assert task.status == "New"
+    assert task.importance == "High"
+    assert task.is_complete is False
+    # snapshots are plain tuples
+    assert not hasattr(task, '__dict__')
+    assert task == LPTask(*tuple(task))
+
+
+def test_refine_tasks_returns_snapshots():
+    config = MagicMock(restricted_pkgs=["glibc"], special_packages=["apport"])
+    tasks = [
+        lp_entry('Bug #1 in glibc (Ubuntu): "a"', "glibc (Ubuntu)"),
+        lp_entry('Bug #1 in glibc (Ubuntu Jammy): "a"',
+                 "glibc (Ubuntu Jammy)"),
+        lp_entry('Bug #2 in apport: "b"', "apport"),
+        lp_entry('Bug #3 in vim (Ubuntu): "c"', "vim (Ubuntu)"),
+        lp_entry('Bug #4 in glibc (Ubuntu): "d"', "glibc (Ubuntu)",
+                 status="Fix Released"),
+    ]
+
+    refined = refine_tasks(tasks, config)
+
+    assert list(refined) == [(1, "glibc"), (2, "apport")]
+    assert len(refined[(1, "glibc")]) == 2
+    assert all(isinstance(t, LPTask) for t in refined[(1, "glibc")])
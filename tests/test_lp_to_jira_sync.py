@@ -3,7 +3,15 @@ import pytest
 from unittest.mock import patch, MagicMock
 from io import StringIO
 from lp_to_jira_sync.lp_to_jira_sync import \
-    get_bug_id, get_bug_pkg, revert_jira_status
+    get_bug_id, get_bug_pkg, revert_jira_status, bugset_labels, \
+    labels_bugset, is_bug_in_jira, find_bugs_in_jira_project, backfill_labels, \
+    fingerprint, is_up_to_date, process_issues, sync, find_sponsored_bugs, \
+    scope_jql, search_lp_tasks, plan_lp_search, schedule_bugsets, \
+    refine_tasks, checklist, main
+from lp_to_jira_sync.lp_search import TaskSearch
+from lp_to_jira_sync.lp_task import LPTask
+from lp_to_jira_sync.bulk_edit import BulkEdits
+from lp_to_jira_sync.jira_issue import JiraIssue
 
 
 def test_get_bug_id():
@@ -48,3 +56,530 @@ def test_revert_bug_reopened():
 
     revert_jira_status(config, issue, tasks)
     config.jira.transition_issue.assert_called_with(issue, transition='Triaged')
+
+def test_bugset_labels():
+    labels = bugset_labels((123234, "linux-firmware"))
+    assert labels == ["lp-to-jira-sync", "lp-bug-123234",
+                      "lp-pkg-linux-firmware"]
+    assert labels_bugset(labels) == (123234, "linux-firmware")
+    assert labels_bugset(["triage", "lp-bug-1"]) is None
+    assert labels_bugset(["lp-bug-x", "lp-pkg-a"]) is None
+    assert labels_bugset(None) is None
+
+def test_is_bug_in_jira_by_labels():
+    jira = MagicMock()
+    jira.search_issues.return_value = ["FR-1"]
+
+    assert is_bug_in_jira(jira, (1234, "glibc"), "FR") == "FR-1"
+    jira.search_issues.assert_called_once_with(
+        'project = "FR" AND labels = "lp-bug-1234" AND labels = "lp-pkg-glibc"')
+
+def test_is_bug_in_jira_falls_back_to_title():
+    jira = MagicMock()
+    jira.search_issues.side_effect = [[], ["FR-1"]]
+
+    assert is_bug_in_jira(jira, (1234, "glibc"), "FR") == "FR-1"
+    assert "LP#1234 [glibc]" in jira.search_issues.call_args[0][0]
+
+def test_is_bug_in_jira_by_title_only_before_backfill():
+    jira = MagicMock()
+    jira.search_issues.return_value = []
+
+    assert is_bug_in_jira(jira, (1234, "glibc"), "FR", by_title=False) is None
+    jira.search_issues.assert_called_once()
+
+def test_new_bugs_are_searched_once():
+    config = fingerprint_config()
+    config.unlabelled_issues = None
+    # No unlabelled issues, then neither bug is found by its labels
+    config.jira.search_issues.side_effect = [{'total': 0}, [], []]
+    created = synced_issue("Untriaged")
+    config.jira.create_issue.return_value = created
+
+    process_issues({(1234, "glibc"): [lp_task()],
+                    (1235, "glibc"): [lp_task()]}, {}, config)
+
+    assert config.jira.search_issues.call_count == 3
+    assert config.unlabelled_issues is False
+    assert config.jira.create_issue.call_count == 2
+
+def raw_issue(key, labels, fingerprint=None):
+    raw = {'key': key,
+           'fields': {'summary': "LP#1 [glibc] It is broken",
+                      'status': {'name': "Triaged"},
+                      'labels': labels}}
+    if fingerprint:
+        raw['properties'] = {'lp-to-jira-sync': {'fingerprint': fingerprint}}
+    return raw
+
+def test_find_bugs_in_jira_project_uses_labels():
+    jira = MagicMock()
+    labelled = raw_issue("FR-1", bugset_labels((1, "glibc")), "abc")
+    broken = raw_issue("FR-2", ["lp-to-jira-sync"])
+    jira.search_issues.side_effect = [{'issues': [labelled, broken]},
+                                      {'issues': []}]
+
+    assert find_bugs_in_jira_project(jira, "FR") == {(1, "glibc"): JiraIssue(
+        "FR-1", "LP#1 [glibc] It is broken", "Triaged", "abc")}
+    assert 'labels = "lp-to-jira-sync"' in jira.search_issues.call_args[0][0]
+
+def test_find_bugs_in_jira_project_indexes_unlabelled_issues():
+    jira = MagicMock()
+    legacy = raw_issue("FR-1", [])
+    labelled = raw_issue("FR-2", bugset_labels((1, "glibc")), "abc")
+    other = raw_issue("FR-3", None)
+    other['fields']['summary'] = "LP#2 [shim] Unsigned"
+    jira.search_issues.side_effect = [
+        {'issues': [labelled, legacy, other]}, {'issues': []}]
+
+    assert find_bugs_in_jira_project(jira, "FR", unlabelled=True) == {
+        (1, "glibc"): JiraIssue(
+            "FR-2", "LP#1 [glibc] It is broken", "Triaged", "abc"),
+        (2, "shim"): JiraIssue("FR-3", "LP#2 [shim] Unsigned", "Triaged",
+                               None)}
+    assert ('(labels = "lp-to-jira-sync" OR summary ~ "LP#")'
+            in jira.search_issues.call_args[0][0])
+
+def test_backfill_labels():
+    config = MagicMock(project="FR", dry_run=False)
+    issue = MagicMock(key="FR-1")
+    issue.fields.summary = "LP#1234 [glibc] It is broken"
+    issue.fields.labels = ["triage", "lp-to-jira-sync"]
+    other = MagicMock(key="FR-2")
+    other.fields.summary = "LP#1234 without package"
+    config.jira.search_issues.return_value = [issue, other]
+
+    backfill_labels(config)
+
+    issue.update.assert_called_once_with(fields={'labels': [
+        "triage", "lp-to-jira-sync", "lp-bug-1234", "lp-pkg-glibc"]})
+    other.update.assert_not_called()
+
+def lp_task(series="", status="New", importance="High"):
+    return LPTask(1234, "glibc (Ubuntu{})".format(series),
+                  'Bug #1234 in glibc (Ubuntu{}): "It is broken"'.format(
+                      series),
+                  status, importance, None, False, "")
+
+def test_checklist_keeps_series_in_place():
+    devel, jammy = lp_task(), lp_task(" Jammy")
+    released = devel._replace(status="Fix Released", is_complete=True)
+
+    assert checklist([jammy, devel]) == checklist([devel, jammy]) == (
+        "# Default checklist\n"
+        "* [open] glibc (Ubuntu Jammy) - New - High\n"
+        "* [open] glibc (Ubuntu) - New - High")
+    assert checklist([released, jammy]) == (
+        "# Default checklist\n"
+        "* [open] glibc (Ubuntu Jammy) - New - High\n"
+        "* [done] glibc (Ubuntu) - Fix Released - High")
+
+def fingerprint_config():
+    config = MagicMock(team_ids=[], jira_components=[], dry_run=False,
+                       checkpoint=None, jira_snapshot=None,
+                       bulk_edits=None, budget=None)
+    return config
+
+def test_fingerprint_follows_lp_state():
+    config = fingerprint_config()
+    taskset = [lp_task(), lp_task(" Jammy")]
+
+    assert fingerprint(taskset, config) == fingerprint(list(taskset), config)
+    assert fingerprint(taskset, config) != fingerprint(
+        [lp_task(importance="Low"), lp_task(" Jammy")], config)
+    assert fingerprint(taskset, config) != fingerprint(
+        [lp_task(), lp_task(" Jammy", status="Fix Released")], config)
+
+def test_up_to_date_issue_is_not_synced():
+    config = fingerprint_config()
+    taskset = [lp_task()]
+    issue = JiraIssue("FR-1", "LP#1234 [glibc] It is broken", "Triaged",
+                      fingerprint(taskset, config))
+
+    assert is_up_to_date(taskset, issue, config)
+    process_issues({(1234, "glibc"): taskset}, {(1234, "glibc"): issue},
+                   config)
+    config.jira.issue.assert_not_called()
+
+    issue = issue._replace(status="Untriaged")
+    assert not is_up_to_date(taskset, issue, config)
+
+def test_changed_issue_is_synced_and_fingerprinted():
+    config = fingerprint_config()
+    taskset = [lp_task()]
+    issue = JiraIssue("FR-1", "LP#1234 [glibc] It is broken", "Triaged",
+                      "old")
+    full_issue = config.jira.issue.return_value
+    full_issue.key = "FR-1"
+    full_issue.raw = {}
+    full_issue.fields.summary = "LP#1234 [glibc] It is broken"
+    full_issue.fields.priority.name = "High"
+
+    process_issues({(1234, "glibc"): taskset}, {(1234, "glibc"): issue},
+                   config)
+
+    config.jira.issue.assert_called_once()
+    config.jira.add_issue_property.assert_called_once_with(
+        "FR-1", "lp-to-jira-sync",
+        {'fingerprint': fingerprint(taskset, config)})
+
+def test_schedule_most_important_changes_first():
+    config = fingerprint_config()
+    tasks = {(1, "glibc"): [lp_task(importance="Low")],
+             (2, "glibc"): [lp_task(importance="Critical")],
+             (3, "glibc"): [lp_task(importance="Critical")],
+             (4, "glibc"): [lp_task(importance="Critical")],
+             (5, "glibc"): [lp_task(importance="Wishlist")]}
+    issues = {
+        (2, "glibc"): JiraIssue("FR-2", "", "Triaged", "old"),
+        (4, "glibc"): JiraIssue("FR-4", "", "Triaged", fingerprint(
+            tasks[(4, "glibc")], config)),
+        (5, "glibc"): JiraIssue("FR-5", "", "Triaged", "old")}
+
+    assert schedule_bugsets(tasks, issues, config) == [
+        (3, "glibc"), (2, "glibc"), (1, "glibc"), (5, "glibc"),
+        (4, "glibc")]
+
+def test_exhausted_budget_leaves_bugsets_for_next_run():
+    config = fingerprint_config()
+    config.budget = MagicMock()
+    config.budget.exhausted.return_value = "10 writes"
+    issue = JiraIssue("FR-1", "LP#1234 [glibc] It is broken", "Triaged", "old")
+
+    process_issues({(1234, "glibc"): [lp_task()]}, {(1234, "glibc"): issue},
+                   config)
+
+    config.jira.issue.assert_not_called()
+    # Not mistaken for an issue only active in Jira
+    config.jira.transition_issue.assert_not_called()
+
+def test_queued_bulk_edits_count_against_the_budget():
+    config = fingerprint_config()
+    config.bulk_edits = MagicMock()
+    config.bulk_edits.pending_writes.return_value = 7
+    config.budget = MagicMock()
+    config.budget.exhausted.return_value = "10 writes"
+    issue = JiraIssue("FR-1", "LP#1234 [glibc] It is broken", "Triaged", "old")
+
+    process_issues({(1234, "glibc"): [lp_task()]}, {(1234, "glibc"): issue},
+                   config)
+
+    config.budget.exhausted.assert_called_once_with(7)
+    # The queued edits are still sent
+    config.bulk_edits.flush.assert_called_once()
+
+def synced_issue(status):
+    issue = MagicMock(key="FR-1")
+    issue.raw = {}
+    issue.fields.status.name = status
+    issue.fields.summary = "LP#1234 [glibc] It is broken"
+    issue.fields.labels = bugset_labels((1234, "glibc"))
+    issue.fields.priority.name = "High"
+    return issue
+
+def test_unlabelled_issue_found_by_title_is_synced():
+    config = fingerprint_config()
+    config.unlabelled_issues = True
+    config.sponsored_bugs = set()
+    legacy = synced_issue("Untriaged")
+    legacy.fields.labels = ["triage"]
+    legacy.fields.priority.name = "Low"
+    config.jira.search_issues.side_effect = [[], [legacy]]
+
+    process_issues({(1234, "glibc"): [lp_task()]}, {}, config)
+
+    config.jira.create_issue.assert_not_called()
+    legacy.update.assert_any_call(fields={'labels': [
+        "triage", "lp-to-jira-sync", "lp-bug-1234", "lp-pkg-glibc"]})
+    legacy.update.assert_any_call(priority={"name": "High"})
+    config.jira.transition_issue.assert_called_once_with(
+        legacy, transition='Triaged')
+
+def test_sync_sponsored_bug_needs_sponsoring():
+    config = fingerprint_config()
+    config.sponsored_bugs = {1234}
+    issue = synced_issue("Untriaged")
+
+    sync([lp_task()], issue, config)
+
+    config.jira.transition_issue.assert_called_once_with(
+        issue, transition='Sponsoring Needed')
+
+def test_sync_sponsored_bug_in_progress_is_left_alone():
+    config = fingerprint_config()
+    config.sponsored_bugs = {1234}
+    issue = synced_issue("In Progress")
+
+    sync([lp_task()], issue, config)
+
+    config.jira.transition_issue.assert_not_called()
+
+def test_sync_untriaged_bug_is_triaged():
+    config = fingerprint_config()
+    config.sponsored_bugs = {42}
+    issue = synced_issue("Untriaged")
+
+    sync([lp_task()], issue, config)
+
+    config.jira.transition_issue.assert_called_once_with(
+        issue, transition='Triaged')
+
+def test_sync_ignores_equivalent_fields():
+    config = fingerprint_config()
+    config.jira_components = ["Boot"]
+    config.package_to_component.return_value = "boot"
+    issue = synced_issue("Triaged")
+    issue.fields.summary = "LP#1234 [glibc]  It is broken"
+    issue.fields.customfield_10039 = (
+        "# Default checklist\n"
+        "* [open] glibc (Ubuntu) - New - High\n"
+        "* [open] glibc (Ubuntu Jammy) - New - High")
+    component = MagicMock()
+    component.name = "Boot"
+    issue.fields.components = [component]
+
+    sync([lp_task(" Jammy"), lp_task()], issue, config)
+
+    issue.update.assert_not_called()
+    config.jira.add_comment.assert_not_called()
+
+def test_sync_queues_priority_in_bulk_edits():
+    config = fingerprint_config()
+    config.bulk_edits = BulkEdits(config.jira)
+    issue = synced_issue("Triaged")
+    issue.fields.priority.name = "Low"
+
+    sync([lp_task()], issue, config)
+
+    issue.update.assert_not_called()
+    assert config.bulk_edits.is_pending("FR-1")
+    # Not up to date until the priority is sent
+    config.jira.add_issue_property.assert_not_called()
+
+    config.bulk_edits.flush()
+
+    config.jira._session.put.assert_called_once_with(
+        config.jira._get_url.return_value,
+        data='{"fields": {"priority": {"name": "High"}}}')
+    config.jira.add_issue_property.assert_called_once()
+
+def test_bugset_is_complete_once_its_bulk_edits_are_sent():
+    config = fingerprint_config()
+    config.bulk_edits = BulkEdits(config.jira)
+    config.checkpoint = MagicMock()
+    config.checkpoint.is_done.return_value = False
+    issue = JiraIssue("FR-1", "LP#1234 [glibc] It is broken", "Triaged",
+                      "old")
+    full_issue = synced_issue("Triaged")
+    full_issue.fields.priority.name = "Low"
+    config.jira.issue.return_value = full_issue
+    # A resumed run would skip the priority if journalled before
+    config.checkpoint.complete.side_effect = (
+        lambda bugset: config.jira._session.put.assert_called_once())
+
+    process_issues({(1234, "glibc"): [lp_task()]}, {(1234, "glibc"): issue},
+                   config)
+
+    config.checkpoint.complete.assert_called_once_with((1234, "glibc"))
+
+@patch('lp_to_jira_sync.lp_to_jira_sync.TaskSearch')
+def test_find_sponsored_bugs(mock_search):
+    config = MagicMock(tag="foo", lp_api_root="https://lp/")
+    mock_search.return_value = [lp_task(), lp_task(" Jammy")]
+
+    assert find_sponsored_bugs(config, ["New"]) == {1234}
+    params = mock_search.call_args[0][2]
+    assert params['bug_subscriber'] == "https://lp/~ubuntu-sponsors"
+    assert params['tags'] == "foo"
+
+def scope_config(bug=None, packages=[]):
+    return MagicMock(tag="foo", lp_api_root="https://lp/", scope_bug=bug,
+                     scope_packages=packages, special_packages=["apport"],
+                     lp_page_size=300, lp_workers=4)
+
+def test_scope_jql():
+    assert scope_jql(scope_config()) == ""
+    assert scope_jql(scope_config(bug=1234)) == 'labels = "lp-bug-1234"'
+    assert scope_jql(scope_config(bug=1, packages=["glibc", "apport"])) == (
+        'labels = "lp-bug-1" AND labels in ("lp-pkg-glibc", "lp-pkg-apport")')
+
+def task(bug_id, target, status="New", importance="High"):
+    return LPTask(bug_id, target, 'Bug #{} in {}: "a"'.format(bug_id, target),
+                  status, importance, None, False, "")
+
+# What LP knows about the bugs tagged foo
+lp_bug_tasks = [
+    # Fixed in devel, the SRU is still open
+    task(1, "glibc (Ubuntu)", "Fix Released"),
+    task(1, "glibc (Ubuntu Jammy)", "New", "Medium"),
+    # Tracked upstream and in Ubuntu
+    task(2, "apport", "New", "Low"),
+    task(2, "apport (Ubuntu)", "Triaged"),
+    task(3, "glibc (Ubuntu)", "Invalid"),
+    task(3, "glibc (Ubuntu Jammy)", "Confirmed"),
+    task(3, "vim (Ubuntu)"),
+    task(4, "glibc"),
+    task(4, "shim (Ubuntu)"),
+    task(5, "vim (Ubuntu)"),
+]
+
+class FakeSearch:
+    """TaskSearch reading lp_bug_tasks"""
+    global_size = 0
+
+    def __init__(self, root, target, params, page_size=300, workers=4,
+                 session=None, op='searchTasks'):
+        self.target = target
+        self.url = root + target
+        self.params = params
+        self.page_size = page_size
+
+    def tasks(self):
+        if self.target.startswith("bugs/"):
+            bug_id = int(self.target.split("/")[1])
+            return [t for t in lp_bug_tasks if t.bug_id == bug_id]
+        if self.target == "bugs":
+            found = lp_bug_tasks
+        elif self.target.startswith("ubuntu/+source/"):
+            found = [t for t in lp_bug_tasks if t.target_name ==
+                     self.target.split("/")[-1] + " (Ubuntu)"]
+        else:
+            found = [t for t in lp_bug_tasks if t.target_name == self.target]
+        return [t for t in found if t.status in self.params['status']]
+
+    def fetch(self, url):
+        return {'tags': ["foo"]}
+
+    def __len__(self):
+        if self.target == "bugs":
+            return self.global_size
+        return len(self.tasks())
+
+    def __iter__(self):
+        return iter(self.tasks())
+
+statuses = ['Triaged', 'Fix Committed', 'New', 'In Progress', 'Incomplete',
+            'Confirmed', 'Fix Released']
+
+@patch('lp_to_jira_sync.lp_to_jira_sync.TaskSearch', FakeSearch)
+def test_search_lp_tasks_for_packages():
+    tasks = search_lp_tasks(scope_config(packages=["glibc", "apport"]),
+                            statuses)
+
+    assert sorted(tasks) == sorted([
+        task(1, "glibc (Ubuntu)", "Fix Released"),
+        task(1, "glibc (Ubuntu Jammy)", "New", "Medium"),
+        task(2, "apport", "New", "Low"),
+        task(2, "apport (Ubuntu)", "Triaged"),
+        task(3, "glibc (Ubuntu Jammy)", "Confirmed")])
+
+@patch('lp_to_jira_sync.lp_to_jira_sync.TaskSearch', FakeSearch)
+def test_scoped_run_keeps_ubuntu_tasks_of_special_packages():
+    config = scope_config(packages=["apport"])
+    config.restricted_pkgs = []
+
+    tasks = refine_tasks(search_lp_tasks(config, statuses), config)
+
+    # so the lp-pkg-apport issue isn't taken for a Jira only one
+    assert list(tasks) == [(2, "apport")]
+    assert [t.target_name for t in tasks[(2, "apport")]] == [
+        "apport (Ubuntu)", "apport"]
+
+@patch('lp_to_jira_sync.lp_to_jira_sync.TaskSearch', FakeSearch)
+def test_search_plans_find_the_same_tasks():
+    config = planner_config(["glibc", "shim"])
+    config.lp_page_size = 1
+
+    FakeSearch.global_size = 1
+    global_search = plan_lp_search(config, {'tags': "foo",
+                                            'status': statuses})
+    assert isinstance(global_search, FakeSearch)
+
+    FakeSearch.global_size = 100
+    per_package = plan_lp_search(config, {'tags': "foo", 'status': statuses})
+    assert isinstance(per_package, list)
+
+    refined = refine_tasks(global_search, config)
+    assert refine_tasks(per_package, config) == refined
+    assert refine_tasks(reversed(list(global_search)), config) == refined
+    assert sorted(refined) == [(1, "glibc"), (2, "apport"), (3, "glibc"),
+                               (4, "shim")]
+    # The Ubuntu task of the special package isn't lost
+    assert len(refined[(2, "apport")]) == 2
+
+@patch('lp_to_jira_sync.lp_to_jira_sync.TaskSearch', FakeSearch)
+def test_plan_lp_search_decides_from_first_pages():
+    config = planner_config(["glibc", "shim"])
+    config.lp_page_size = 1
+    # Fewer package targets than global pages, but not once their tasks
+    # are counted as bugs to read
+    FakeSearch.global_size = 7
+
+    with patch.object(FakeSearch, '__iter__',
+                      lambda self: pytest.fail("read past first pages")):
+        search = plan_lp_search(config, {'tags': "foo", 'status': statuses})
+
+    assert isinstance(search, FakeSearch)
+    assert search.target == "bugs"
+
+@patch('lp_to_jira_sync.lp_to_jira_sync.TaskSearch')
+def test_search_lp_tasks_for_bug(mock_search):
+    shim = LPTask(1234, "shim (Ubuntu)", 'Bug #1234 in shim (Ubuntu): "a"',
+                  "New", "High", None, False, "")
+    mock_search.return_value.__iter__.return_value = [
+        lp_task(), lp_task(" Jammy", status="Invalid"), shim]
+    mock_search.return_value.fetch.return_value = {'tags': ["foo"]}
+
+    tasks = search_lp_tasks(scope_config(bug=1234), ["New"])
+    assert tasks == [lp_task(), shim]
+    assert mock_search.call_args[0][1] == "bugs/1234/bug_tasks"
+
+    tasks = search_lp_tasks(scope_config(bug=1234, packages=["shim"]),
+                            ["New"])
+    assert tasks == [shim]
+
+    # The bug lost its tag, it has nothing left to sync
+    mock_search.return_value.fetch.return_value = {'tags': ["bar"]}
+    assert search_lp_tasks(scope_config(bug=1234), ["New"]) == []
+
+def test_find_bugs_in_jira_project_with_scope():
+    jira = MagicMock()
+    jira.search_issues.return_value = {'issues': []}
+
+    find_bugs_in_jira_project(jira, "FR", 'labels = "lp-bug-1"')
+    assert jira.search_issues.call_args[0][0].endswith(
+        ' AND labels = "lp-bug-1"')
+
+def planner_config(packages):
+    config = scope_config()
+    config.restricted_pkgs = packages
+    config.special_packages = ["apport"]
+    config.lp_page_size = 100
+    return config
+
+@patch.object(TaskSearch, '__len__', return_value=250)
+def test_plan_lp_search_global(mock_len):
+    search = plan_lp_search(planner_config(["glibc", "shim"]), {})
+
+    assert isinstance(search, TaskSearch)
+    assert search.url == "https://lp/bugs"
+
+def test_jira_only_issues_are_closed_by_key():
+    config = fingerprint_config()
+    issue = JiraIssue("FR-9", "LP#9 [vim] Gone", "Triaged", None)
+
+    process_issues({}, {(9, "vim"): issue}, config)
+
+    config.jira.transition_issue.assert_called_once_with(
+        "FR-9", transition="Done")
+    config.jira.add_comment.assert_called_once()
+    config.jira.issue.assert_not_called()
+
+@pytest.mark.parametrize('option, value', [
+    ('--lp-page-size', '0'), ('--lp-page-size', '-1'),
+    ('--lp-page-size', '301'), ('--lp-page-size', 'x'),
+    ('--lp-workers', '0'), ('--lp-workers', '-2')])
+def test_lp_fetch_options_are_validated(option, value, capsys):
+    with pytest.raises(SystemExit):
+        main(['-p', 'FR', '-t', 'foo', option, value])
+    assert "error: argument {}".format(option) in capsys.readouterr().err
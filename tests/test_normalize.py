@@ -0,0 +1,26 @@
+from lp_to_jira_sync.normalize import canonical_title, canonical_checklist, \
+    find_name
+
+
+def test_canonical_title():
+    assert canonical_title(" LP#1 [glibc]  It is\tbroken ") == \
+        "LP#1 [glibc] It is broken"
+    assert canonical_title(None) == ""
+
+
+def test_canonical_checklist():
+    checklist = ("# Default checklist\n"
+                 "* [open] glibc (Ubuntu Noble) - New - High\n"
+                 "* [open] glibc (Ubuntu) - New - High")
+    reordered = ("# Default checklist\n"
+                 "* [open] glibc (Ubuntu)  - New - High\n"
+                 "* [open] glibc (Ubuntu Noble) - New - High\n")
+    assert canonical_checklist(checklist) == canonical_checklist(reordered)
+    assert canonical_checklist(checklist) != canonical_checklist(
+        reordered.replace("[open] glibc (Ubuntu)", "[done] glibc (Ubuntu)"))
+    assert canonical_checklist(None) == ""
+
+
+def test_find_name():
+    assert find_name("Boot ", ["crypto", "boot"]) == "boot"
+    assert find_name("boot", ["crypto"]) is None
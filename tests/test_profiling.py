@@ -0,0 +1,39 @@
+import pstats
+import time
+from lp_to_jira_sync import http_hooks
+from lp_to_jira_sync.http_hooks import HTTPRequest
+from lp_to_jira_sync.profiling import Profiler, profile_bugset
+
+
+def test_phase_dumps_and_slowest_bugsets(tmp_path, capsys):
+    profiler = Profiler(str(tmp_path), top=1).start()
+    with profiler.phase('lp-fetch'):
+        sum(range(1000))
+
+    with profiler.bugset((1, 'glibc')):
+        pass
+    with profiler.bugset((2, 'shim')):
+        profiler(HTTPRequest('requests', 'PUT', 'https://jira/issue/FR-2',
+                             None), lambda: None)
+        time.sleep(0.01)
+    # Requests outside of a bugset are not attributed
+    profiler(HTTPRequest('requests', 'GET', 'https://lp/bugs', None),
+             lambda: None)
+    profiler.stop()
+
+    assert not http_hooks._hooks
+    pstats.Stats(str(tmp_path / '01-lp-fetch.prof'))
+
+    report = (tmp_path / 'report.txt').read_text()
+    assert 'lp-fetch' in report
+    assert 'Slowest 1 of 2 bugsets' in report
+    assert 'LP: #2 [shim]' in report
+    assert 'PUT https://jira/issue/FR-2' in report
+    assert 'LP: #1 [glibc]' not in report
+    assert 'https://lp/bugs' not in report
+    assert report in capsys.readouterr().out
+
+
+def test_profile_bugset_without_profiler():
+    with profile_bugset(None, (1, 'glibc')):
+        pass
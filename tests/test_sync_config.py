@@ -71,10 +71,10 @@ def test_init_with_jira_config(mock_jira, mock_jira_config, mock_launchpad):
     assert config.args is None
 
 
-@patch('lp_to_jira_sync.sync_config.requests')
+@patch('lp_to_jira_sync.sync_config.SessionFactory')
 @patch('lp_to_jira_sync.sync_config.jira_config')
 @patch('lp_to_jira_sync.sync_config.Launchpad')
-def test_init_with_lp_team(mock_launchpad, mock_jira_config, mock_requests):
+def test_init_with_lp_team(mock_launchpad, mock_jira_config, mock_factory):
     mock_jira = MagicMock()
     mock_jira_config.return_value = MagicMock(jira=mock_jira)
 
@@ -91,8 +91,10 @@ def test_init_with_lp_team(mock_launchpad, mock_jira_config, mock_requests):
         .getBugSubscriberPackages.return_value) = [pkg1, pkg2]
 
     # We will skip the json download at this time
-    mock_requests = MagicMock()
-    mock_requests.get.return_value = 404
+    mock_response = MagicMock()
+    mock_response.status_code = 404
+    mock_factory.return_value.session.return_value.get.return_value = \
+        mock_response
 
     config = SyncConfig(jira=mock_jira,
                         lp_api=mock_lp,
@@ -110,11 +112,11 @@ def test_init_with_lp_team(mock_launchpad, mock_jira_config, mock_requests):
     assert config.args is None
 
 
-@patch('lp_to_jira_sync.sync_config.requests')
+@patch('lp_to_jira_sync.sync_config.SessionFactory')
 @patch('lp_to_jira_sync.sync_config.jira_config')
 @patch('lp_to_jira_sync.sync_config.Launchpad')
 def test_init_with_lp_team_and_json(
-    mock_launchpad, mock_jira_config, mock_requests):
+    mock_launchpad, mock_jira_config, mock_factory):
 
     mock_jira = MagicMock()
     mock_jira_config.return_value = MagicMock(jira=mock_jira)
@@ -132,7 +134,8 @@ def test_init_with_lp_team_and_json(
     mock_response.json.return_value = pkg_data
 
     # We will skip the json download at this time
-    mock_requests.get.return_value = mock_response
+    mock_factory.return_value.session.return_value.get.return_value = \
+        mock_response
 
     config = SyncConfig(jira=mock_jira,
                         lp_api=mock_lp,
@@ -229,5 +232,47 @@ def test_init_with_team_mapping(mock_launchpad,
     assert "grub2" in config.components_ids["boot"]
     assert "shim" in config.components_ids["boot"]
     assert "openssl" in config.components_ids["crypto"]
+    assert config.package_to_component("shim") == "boot"
+    assert config.package_to_component("openssh") == "crypto"
+    assert config.package_to_component("glibc") == ""
 
     mock_open.assert_called_once_with('ids.json')
+
+
+@patch('lp_to_jira_sync.sync_config.json')
+@patch('lp_to_jira_sync.sync_config.open')
+def test_init_with_scope(mock_open, mock_json):
+    mock_json.load.return_value = {
+        "boot": ["grub2", "shim"],
+        "crypto": ["openssl"]
+    }
+
+    config = SyncConfig(
+        jira=MagicMock(),
+        lp_api=MagicMock(),
+        packages_mapping_json="ids.json",
+        scope_bug=1234,
+        scope_packages=["glibc"],
+        scope_components=["boot"])
+
+    assert config.scope_bug == 1234
+    assert config.scope_packages == ["glibc", "grub2", "shim"]
+
+
+@patch('lp_to_jira_sync.sync_config.JIRA')
+def test_init_with_unknown_scope_component(mock_jira):
+    with pytest.raises(ValueError):
+        SyncConfig(scope_components=["boot"])
+    mock_jira.assert_not_called()
+
+
+@patch('lp_to_jira_sync.sync_config.json')
+@patch('lp_to_jira_sync.sync_config.open')
+@patch('lp_to_jira_sync.sync_config.JIRA')
+def test_init_with_empty_scope_component(mock_jira, mock_open, mock_json):
+    mock_json.load.return_value = {"boot": []}
+
+    with pytest.raises(ValueError):
+        SyncConfig(packages_mapping_json="ids.json",
+                   scope_components=["boot"])
+    mock_jira.assert_not_called()